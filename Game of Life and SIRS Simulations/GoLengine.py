@@ -0,0 +1,385 @@
+import numpy as np
+from hashlife import HashLife
+
+#stepping engines for the game of life on a periodic size x size grid, chosen per model with get_engine(name):
+#   'python' - the reference engine, looping over every cell and counting its eight neighbours one by one
+#   'numpy'  - whole-grid neighbour counts from shifted slices of a grid with a one-cell periodic halo, written into
+#              preallocated double buffers, so a step allocates nothing
+#   'bitpacked' - 64 cells to a uint64 word, with the neighbour counts of 64 cells at a time from bitwise adders.
+#                 on big grids advance, which never unpacks the grid, makes a few billion cell updates a second
+#   'sparse' - only the live cells are stored, as sorted integer keys, and only their neighbours are counted, so a
+#              step costs O(population log population) whatever the size of the grid (up to about 3e9 x 3e9)
+#   'unbounded' - the sparse engine on an infinite plane, the size only sets the window that step(grid) shows
+#   'hashlife' - gosper's hashlife on an infinite plane (hashlife.py), which can jump 2^k generations at once
+#an engine is created for one grid size, and step(grid) returns the grid one generation later. the periodic engines
+#give the same grid cell for cell. the numpy engine hands back one of its own buffers, which the step after next
+#overwrites, and the sparse engines update theirs in place, so copy a grid to keep it for longer. changed_cells()
+#returns the (row, column) of the cells born and of the cells that died in the last step (or advance, for the sparse
+#engines and hashlife), from what the engine already holds, so the grid never has to be copied and compared
+
+ENGINES = {}
+
+def register_engine(name, engine):
+    ENGINES[name] = engine
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError("unknown engine " + str(name) + ", choose from " + ", ".join(ENGINES))
+    return ENGINES[name]
+
+
+class PythonEngine(object):
+    def __init__(self, size):
+        self.size = size
+        self.grid = self.previous_grid = np.zeros((size, size), dtype=np.uint8)
+
+    def step(self, grid):
+        new_grid = np.copy(grid)
+        for i in range(self.size):
+            for j in range(self.size):
+                if grid[i, j] == 1:
+                    if self.neighbours(grid, i, j) < 2 or self.neighbours(grid, i, j) > 3:
+                        new_grid[i, j] = 0
+                elif grid[i, j] == 0:
+                    if self.neighbours(grid, i, j) == 3:
+                        new_grid[i, j] = 1
+        self.previous_grid, self.grid = grid, new_grid
+        return new_grid
+
+    def changed_cells(self):
+        return (np.argwhere((self.grid == 1) & (self.previous_grid == 0)),
+                np.argwhere((self.grid == 0) & (self.previous_grid == 1)))
+
+    def neighbours(self, grid, i, j):
+        neighbours = (grid[(i - 1) % self.size, (j - 1) % self.size]
+                    + grid[(i - 1) % self.size, j % self.size]
+                    + grid[(i - 1) % self.size, (j + 1) % self.size]
+                    + grid[i % self.size, (j - 1) % self.size]
+                    + grid[i % self.size, (j + 1) % self.size]
+                    + grid[(i + 1) % self.size, (j - 1) % self.size]
+                    + grid[(i + 1) % self.size, j % self.size]
+                    + grid[(i + 1) % self.size, (j + 1) % self.size])
+        return neighbours
+
+
+class NumpyEngine(object):
+    def __init__(self, size, replicas=None):
+        self.size = size
+        #with replicas, step takes a (replicas, size, size) stack of independent grids and steps them all at once
+        stack = () if replicas is None else (replicas,)
+        #two uint8 grids with a halo of one cell on every side holding a copy of the opposite edge, so every
+        #neighbour is a plain slice. the grid handed back by step is the interior of one of them
+        self.buffers = [np.zeros(stack + (size + 2, size + 2), dtype=np.uint8) for n in range(2)]
+        self.interiors = [buffer[..., 1:-1, 1:-1] for buffer in self.buffers]
+        self.current = 0
+        self.column_sums = np.empty(stack + (size, size + 2), dtype=np.uint8) #each cell plus the cells above and below it
+        self.counts = np.empty(stack + (size, size), dtype=np.uint8)
+        self.changed = np.empty(stack + (size, size), dtype=np.uint8)
+
+    def step(self, grid):
+        buffer = self.buffers[self.current]
+        if grid is not self.interiors[self.current]: #a grid the engine did not make, e.g. the initial one
+            buffer[..., 1:-1, 1:-1] = grid
+
+        #periodic halo: rows first, then whole columns so the corners are copied too
+        buffer[..., 0, 1:-1] = buffer[..., -2, 1:-1]
+        buffer[..., -1, 1:-1] = buffer[..., 1, 1:-1]
+        buffer[..., 0] = buffer[..., -2]
+        buffer[..., -1] = buffer[..., 1]
+
+        #sum over the 3 x 3 block around every cell, a column of three then a row of three, minus the cell itself
+        np.add(buffer[..., :-2, :], buffer[..., 1:-1, :], out=self.column_sums)
+        np.add(self.column_sums, buffer[..., 2:, :], out=self.column_sums)
+        np.add(self.column_sums[..., :-2], self.column_sums[..., 1:-1], out=self.counts)
+        np.add(self.counts, self.column_sums[..., 2:], out=self.counts)
+        np.subtract(self.counts, buffer[..., 1:-1, 1:-1], out=self.counts)
+
+        #B3/S23: alive next generation if 3 neighbours, or 2 neighbours and alive now, which is (neighbours | cell) == 3
+        np.bitwise_or(self.counts, buffer[..., 1:-1, 1:-1], out=self.counts)
+        self.current = 1 - self.current
+        np.equal(self.counts, 3, out=self.interiors[self.current])
+        return self.interiors[self.current]
+
+    def changes(self):
+        #1 where a cell changed in the last step: the other buffer still holds the grid that step started from
+        np.bitwise_xor(self.interiors[self.current], self.interiors[1 - self.current], out=self.changed)
+        return self.changed
+
+    def changed_cells(self): #with replicas, each row is (replica, row, column)
+        changed = self.changes()
+        return (np.argwhere(changed & self.interiors[self.current]),
+                np.argwhere(changed & self.interiors[1 - self.current]))
+
+
+class BitPackedEngine(object):
+    #column j of a row is bit j % 64 of word j // 64, and the bits past the last column are kept at zero. besides the
+    #dense step(grid), advance works on the packed grid alone, which is where most of the speed is
+    def __init__(self, size):
+        self.size = size
+        self.words = -(-size // 64) #words per row
+        self.last_word = (size - 1) // 64
+        self.last_bit = np.uint64((size - 1) % 64) #column size - 1
+        self.last_mask = np.uint64(2 ** ((size - 1) % 64 + 1) - 1) #columns in the last word
+        #two packed grids with a periodic halo row above and below, the current one and the next generation
+        self.buffers = [np.zeros((size + 2, self.words), dtype='<u8') for n in range(2)]
+        self.current = 0
+        #a generation is worked out a block of rows at a time, small enough for the temporaries to stay in cache
+        self.block = min(size, max(1, 8192 // self.words))
+        self.rows = [np.empty((self.block + 2, self.words), dtype='<u8') for n in range(6)] #shifts and row sums
+        self.scratch = [np.empty((self.block, self.words), dtype='<u8') for n in range(5)]
+        self.grid = None #dense grid handed back by step
+
+    def pack(self, grid):
+        bits = np.zeros((self.size, self.words * 64), dtype=np.uint8)
+        bits[:, :self.size] = grid
+        self.buffers[self.current][1:-1] = np.packbits(bits, axis=1, bitorder='little').view('<u8')
+
+    def unpack(self, packed=None):
+        if packed is None:
+            packed = self.buffers[self.current][1:-1]
+        return np.unpackbits(packed.view(np.uint8), axis=1, bitorder='little')[:, :self.size]
+
+    def population(self):
+        return int(np.sum(np.bitwise_count(self.buffers[self.current][1:-1])))
+
+    def advance(self, nsteps=1):
+        for step in range(nsteps):
+            packed = self.buffers[self.current]
+            packed[0] = packed[-2]
+            packed[-1] = packed[1]
+            new_packed = self.buffers[1 - self.current]
+            for row in range(0, self.size, self.block):
+                end = min(row + self.block, self.size)
+                self.advance_rows(packed[row:end + 2], new_packed[row + 1:end + 1])
+            self.current = 1 - self.current
+
+    def advance_rows(self, packed, out): #next generation of all but the first and last of the packed rows
+        one, top = np.uint64(1), np.uint64(63)
+        n = len(out)
+        west, east, pair0, pair1, triple0, triple1 = [rows[:n + 2] for rows in self.rows]
+        count0, carry, parity, pairs, scratch = [rows[:n] for rows in self.scratch]
+
+        #bit j of west holds the cell in column j - 1 and of east column j + 1: shift by one column, carrying the
+        #end bit of every word into the next one and wrapping the end columns round
+        np.left_shift(packed, one, out=west)
+        np.right_shift(packed[:, :-1], top, out=pair0[:, 1:])
+        west[:, 1:] |= pair0[:, 1:]
+        west[:, 0] |= (packed[:, self.last_word] >> self.last_bit) & one
+        west[:, self.last_word] &= self.last_mask
+        np.right_shift(packed, one, out=east)
+        np.left_shift(packed[:, 1:], top, out=pair0[:, :-1])
+        east[:, :-1] |= pair0[:, :-1]
+        east[:, self.last_word] |= (packed[:, 0] & one) << self.last_bit
+
+        #two bit sums of each row: west + east for the cell's own row, west + cell + east for the rows either side
+        np.bitwise_xor(west, east, out=pair0)
+        np.bitwise_and(west, east, out=pair1)
+        np.bitwise_xor(pair0, packed, out=triple0)
+        np.bitwise_and(pair0, packed, out=triple1)
+        triple1 |= pair1
+
+        #add the bits of weight 1 from the three rows, then see whether exactly one bit of weight 2 is left, which
+        #is a neighbour count of 2 or 3 (bit 0 tells them apart)
+        up0, down0, middle0 = triple0[:-2], triple0[2:], pair0[1:-1]
+        np.bitwise_xor(up0, down0, out=count0)
+        np.bitwise_and(up0, down0, out=carry)
+        np.bitwise_and(middle0, count0, out=scratch)
+        carry |= scratch
+        count0 ^= middle0
+        up1, down1, middle1 = triple1[:-2], triple1[2:], pair1[1:-1]
+        np.bitwise_xor(up1, down1, out=parity)
+        np.bitwise_xor(middle1, carry, out=scratch)
+        np.bitwise_and(parity, scratch, out=pairs) #a weight 2 bit from up or down and one from middle or carry
+        parity ^= scratch
+        np.bitwise_and(up1, down1, out=scratch)
+        pairs |= scratch
+        np.bitwise_and(middle1, carry, out=scratch)
+        pairs |= scratch
+        np.invert(pairs, out=pairs)
+        parity &= pairs #exactly one
+
+        #B3/S23: alive with 3 neighbours, or 2 neighbours and alive now
+        count0 |= packed[1:-1]
+        np.bitwise_and(parity, count0, out=out)
+
+    def step(self, grid):
+        if grid is not self.grid: #a grid the engine did not make, e.g. the initial one
+            self.pack(grid)
+        self.advance()
+        self.grid = self.unpack()
+        return self.grid
+
+    def changed_cells(self): #from the two packed buffers, the one just made and the generation before it
+        new, old = self.buffers[self.current][1:-1], self.buffers[1 - self.current][1:-1]
+        changed = new ^ old
+        return np.argwhere(self.unpack(changed & new)), np.argwhere(self.unpack(changed & old))
+
+
+NEIGHBOUR_OFFSETS = np.array([(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)])
+
+def sorted_difference(a, b): #the keys of sorted a that are not in sorted b, with a binary search for each
+    if len(b) == 0:
+        return a
+    return a[b[np.searchsorted(b, a).clip(max=len(b) - 1)] != a]
+
+class SparseEngine(object):
+    #besides the dense step(grid), the live cells can be used directly with set_cells, advance and cells, which is
+    #the only way to use grids far too big to hold as an array
+    periodic = True
+
+    def __init__(self, size):
+        self.size = size
+        if self.periodic: #key = row * size + column
+            self.width = size
+            self.origin = 0
+        else: #rows and columns can be anywhere in -2^30 <= x < 2^30, shifted to be positive
+            self.width = 2 ** 31
+            self.origin = 2 ** 30
+        self.keys = np.empty(0, dtype=np.int64) #sorted keys of the live cells
+        self.previous_keys = self.keys #and before the last advance
+        self.grid = None #dense window handed back by step
+
+    def set_cells(self, cells): #cells is an (n, 2) array of the (row, column) of every live cell
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        if self.periodic:
+            cells = cells % self.size
+        self.keys = self.previous_keys = np.unique((cells[:, 0] + self.origin) * self.width + cells[:, 1] + self.origin)
+
+    def cells(self, keys=None):
+        rows, columns = np.divmod(self.keys if keys is None else keys, self.width)
+        return np.stack([rows - self.origin, columns - self.origin], axis=1)
+
+    def population(self):
+        return len(self.keys)
+
+    def advance(self, nsteps=1):
+        self.previous_keys = self.keys
+        for step in range(nsteps):
+            if len(self.keys) == 0:
+                return
+            #every neighbour of every live cell, once per live neighbour it has, so the number of times a key
+            #turns up is the neighbour count of that cell. cells with no live neighbours never appear, and they stay dead
+            cells = self.cells()
+            rows = (cells[:, 0, np.newaxis] + NEIGHBOUR_OFFSETS[:, 0]).ravel()
+            columns = (cells[:, 1, np.newaxis] + NEIGHBOUR_OFFSETS[:, 1]).ravel()
+            if self.periodic:
+                rows %= self.size
+                columns %= self.size
+            candidates, counts = np.unique((rows + self.origin) * self.width + columns + self.origin, return_counts=True)
+            alive = np.isin(candidates, self.keys, assume_unique=True)
+            self.keys = candidates[(counts == 3) | ((counts == 2) & alive)] #B3/S23, still sorted
+
+    def changed_cells(self): #a sorted difference each way, O(population log population) like a step
+        return (self.cells(sorted_difference(self.keys, self.previous_keys)),
+                self.cells(sorted_difference(self.previous_keys, self.keys)))
+
+    def step(self, grid):
+        #dense drop-in for the other engines: only the cells that were or become alive are written, so apart from
+        #reading a grid the engine did not make, this costs O(population) too
+        if grid is not self.grid:
+            self.set_cells(np.argwhere(grid))
+            self.grid = np.zeros((self.size, self.size), dtype=np.uint8)
+        else:
+            self.grid[tuple(self.window_cells().T)] = 0
+        self.advance()
+        self.grid[tuple(self.window_cells().T)] = 1
+        return self.grid
+
+    def window_cells(self): #live cells inside the size x size window (all of them on a periodic grid)
+        cells = self.cells()
+        if not self.periodic:
+            cells = cells[np.all((cells >= 0) & (cells < self.size), axis=1)]
+        return cells
+
+class UnboundedEngine(SparseEngine):
+    periodic = False
+
+
+register_engine('python', PythonEngine)
+register_engine('numpy', NumpyEngine)
+register_engine('bitpacked', BitPackedEngine)
+register_engine('sparse', SparseEngine)
+register_engine('unbounded', UnboundedEngine)
+register_engine('hashlife', HashLife)
+
+
+if __name__ == "__main__":
+
+    #check that the engines agree cell for cell and compare their speed
+    import time
+
+    size = 50
+    nsteps = 200
+
+    periodic_engines = [name for name in ENGINES if name not in ('unbounded', 'hashlife')]
+    engines = {name: get_engine(name)(size) for name in periodic_engines}
+    grid = np.random.choice([0, 1], size=(size, size))
+    grids = {name: grid.copy() for name in periodic_engines}
+    for step in range(nsteps):
+        grids = {name: engines[name].step(grids[name]) for name in periodic_engines}
+        if any(not np.array_equal(grids[name], grids['python']) for name in periodic_engines):
+            raise RuntimeError("engines disagree at step " + str(step))
+    print(f"{', '.join(periodic_engines)} agree cell for cell over {nsteps} steps of a random {size} x {size} grid")
+
+    #away from the edges the unbounded plane must agree with the periodic grid
+    glider = np.zeros((size, size), dtype=int)
+    glider[[25, 25, 25, 24, 23], [24, 25, 26, 26, 25]] = 1
+    grids = {'numpy': glider.copy(), 'unbounded': glider.copy()}
+    engines = {name: get_engine(name)(size) for name in grids}
+    for step in range(40):
+        grids = {name: engines[name].step(grids[name]) for name in grids}
+        if not np.array_equal(grids['numpy'], grids['unbounded']):
+            raise RuntimeError("unbounded engine disagrees at step " + str(step))
+    print("unbounded and periodic engines agree on a glider away from the edges")
+
+    for name in ENGINES:
+        engine = get_engine(name)(size)
+        grid = np.random.choice([0, 1], size=(size, size))
+        steps = 20 if name == 'python' else 2000 if name == 'hashlife' else 20000
+        time1 = time.perf_counter()
+        for step in range(steps):
+            grid = engine.step(grid)
+        time2 = time.perf_counter()
+        print(f"{name}\t{steps / (time2 - time1):.1f} steps/s\t{steps * size ** 2 / (time2 - time1):.3g} cell updates/s")
+
+    #on a big grid the packed engine is held back by unpacking the grid every step, so advance is timed on its own
+    big_size = 4096
+    line = f"{big_size} x {big_size}:"
+    for name in ['numpy', 'bitpacked']:
+        engine = get_engine(name)(big_size)
+        grid = np.random.choice([0, 1], size=(big_size, big_size))
+        steps = 5 if name == 'numpy' else 50
+        time1 = time.perf_counter()
+        if name == 'bitpacked':
+            engine.pack(grid)
+            engine.advance(steps)
+        else:
+            for step in range(steps):
+                grid = engine.step(grid)
+        time2 = time.perf_counter()
+        line += f"\t{name} {steps * big_size ** 2 / (time2 - time1):.3g} cell updates/s"
+    print(line)
+
+    #a glider costs the sparse engine the same on any grid, and the numpy engine time in proportion to the area
+    for glider_size in [50, 500, 5000, 10 ** 6]:
+        line = f"glider on {glider_size} x {glider_size}:"
+        for name in ['numpy', 'sparse']:
+            if name == 'numpy' and glider_size > 5000:
+                continue
+            engine = get_engine(name)(glider_size)
+            centre = glider_size // 2
+            if name == 'sparse':
+                engine.set_cells([(centre, centre - 1), (centre, centre), (centre, centre + 1), (centre - 1, centre + 1), (centre - 2, centre)])
+            else:
+                grid = np.zeros((glider_size, glider_size))
+                grid[[centre, centre, centre, centre - 1, centre - 2], [centre - 1, centre, centre + 1, centre + 1, centre]] = 1
+            steps = 200
+            time1 = time.perf_counter()
+            for step in range(steps):
+                if name == 'sparse':
+                    engine.advance()
+                else:
+                    grid = engine.step(grid)
+            time2 = time.perf_counter()
+            line += f"\t{name} {steps / (time2 - time1):.0f} steps/s"
+        print(line)
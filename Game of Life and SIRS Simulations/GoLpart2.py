@@ -1,80 +1,222 @@
-#~ takes about 6.2 hours (?? pause in between)
-#last time took 2.6 hours
-import numpy as np
-import time
-
-class GameofLife(object):
-    def __init__(self, size):
-        self.size = size
-        self.grid = np.random.choice([0, 1], size=(size, size))
-
-    def update(self):
-        new_grid = np.copy(self.grid)
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.grid[i, j] == 1:
-                    if self.neighbours(i, j) < 2 or self.neighbours(i, j) > 3:
-                        new_grid[i, j] = 0
-                elif self.grid[i, j] == 0:
-                    if self.neighbours(i, j) == 3:
-                        new_grid[i, j] = 1
-        self.grid = new_grid
-        
-    
-    def neighbours(self, i, j):
-        neighbours = (self.grid[(i - 1) % self.size, (j - 1) % self.size]
-                    + self.grid[(i - 1) % self.size, j % self.size]
-                    + self.grid[(i - 1) % self.size, (j + 1) % self.size]
-                    + self.grid[i % self.size, (j - 1) % self.size]
-                    + self.grid[i % self.size, (j + 1) % self.size]
-                    + self.grid[(i + 1) % self.size, (j - 1) % self.size]
-                    + self.grid[(i + 1) % self.size, j % self.size]
-                    + self.grid[(i + 1) % self.size, (j + 1) % self.size])
-        return neighbours
-                
-         
-    def run_until_equilibrium(self):
-        active_sites = [np.sum(self.grid)]
-        while True:
-            prev_active_sites = active_sites[-10:]
-            self.update()
-            current_active_sites = np.sum(self.grid)
-            if all(current_active_sites == prev for prev in prev_active_sites) or len(active_sites) > 5000:
-                break
-            active_sites.append(current_active_sites)
-        if len(active_sites) <= 5000:
-            time_to_equilibrium = len(active_sites) - 10
-            return time_to_equilibrium 
-
-if __name__ == "__main__":
-
-    num_simulations = 1000
-    size = 50
-
-    equilibration_times = []
-    
-    total_time = 0
-    for i in range(num_simulations):
-        time1 = time.time()
-        model = GameofLife(size)
-        time_to_equilibrium = model.run_until_equilibrium()
-        equilibration_times.append(time_to_equilibrium)
-        time2 = time.time()
-        part_n_time = time2 - time1
-        total_time += part_n_time
-        time_left = (total_time/(i+1))*(num_simulations - (i+1))
-        if i%2 == 0:
-            print("part " + str(i + 1) + " time: " + str(part_n_time))
-            print("estimated time left: " + str(time_left))
-            print("")
-    
-    print("total time: " + str(total_time))
-    
-    with open('GoLpart2data.txt', 'w') as f:
-        f.write("Equilibration Times\n")
-        for e_time in equilibration_times:
-            f.write(f"{e_time}\n")
-
-    
-
+#~ takes about 6.2 hours (?? pause in between)
+#last time took 2.6 hours
+#(both with the python engine, the numpy engine takes a few minutes and the ensemble about 15 seconds)
+import numpy as np
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import GoLengine
+
+#equilibrium is the first time the grid repeats a state it was in before: from then on it goes round the same cycle
+#for ever. the states are compared by zobrist hashes, every cell has a random 64 bit key and the hash of a grid is
+#the xor of the keys of its live cells, so after a step only the keys of the cells that changed are xor'ed in. the
+#engine says which cells those are (the numpy engine from its two buffers, the sparse ones from their keys), so the
+#grid is never copied or compared. only the hashes of the last max_period generations are kept, so cycles longer
+#than that are not found
+
+def zobrist_keys(size): #the same keys every time, from their own generator so np.random is left alone
+    return np.random.default_rng(0).integers(0, 2 ** 63, size=(size, size), dtype=np.uint64) << np.uint64(1)
+
+def zobrist_hash(grid, keys):
+    return np.bitwise_xor.reduce(keys[grid == 1])
+
+DATA_HEADER = "Equilibration Times\tPeriods\tIndex\n" #index of the simulation, as the parallel run writes them in any order
+
+class GameofLife(object):
+    def __init__(self, size, engine='numpy', rng=None):
+        self.size = size
+        self.grid = (np.random if rng is None else rng).choice([0, 1], size=(size, size))
+        self.engine = GoLengine.get_engine(engine)(size) #'python' or 'numpy' stepping engine from GoLengine.py
+
+    def update(self):
+        self.grid = self.engine.step(self.grid)
+         
+    def run_until_equilibrium(self, max_period=1000):
+        #returns the generation the grid first reached the state it keeps coming back to, and the period it comes back
+        #with (1 for a still life), or None, None if no state has repeated after 5000 steps
+        keys = zobrist_keys(self.size)
+        current_hash = zobrist_hash(self.grid, keys)
+        history = {current_hash: 0} #hash: generation
+        order = deque([current_hash])
+        changes = getattr(self.engine, 'changes', None) #the numpy engine's grid of changed cells, the quickest
+        for t in range(1, 5001):
+            self.update()
+            if changes is not None:
+                current_hash ^= np.bitwise_xor.reduce(keys[changes().view(bool)])
+            else:
+                for cells in self.engine.changed_cells():
+                    current_hash ^= np.bitwise_xor.reduce(keys[cells[:, 0], cells[:, 1]])
+            if current_hash in history:
+                return history[current_hash], t - history[current_hash]
+            history[current_hash] = t
+            order.append(current_hash)
+            if len(order) > max_period:
+                del history[order.popleft()]
+        return None, None
+
+class GameofLifeEnsemble(object):
+    #independent random grids stepped together as one (replicas, size, size) stack by the numpy engine. the grids are
+    #the same as those of the same number of GameofLife made one after the other, so the times and periods are too
+    def __init__(self, size, replicas):
+        self.size = size
+        self.replicas = replicas
+        self.grids = np.random.choice([0, 1], size=(replicas, size, size))
+
+    def run_until_equilibrium(self, max_period=1000):
+        #GameofLife.run_until_equilibrium for every grid at once, returning a list of times and a list of periods
+        times = [None] * self.replicas
+        periods = [None] * self.replicas
+        keys = zobrist_keys(self.size)
+        indices = np.arange(self.replicas) #which replica each grid in the stack is
+        running = np.ones(self.replicas, dtype=bool)
+        engine = GoLengine.NumpyEngine(self.size, self.replicas)
+        grids = self.grids
+        hashes = np.array([zobrist_hash(grid, keys) for grid in grids], dtype=np.uint64)
+        histories = [{current_hash: 0} for current_hash in hashes]
+        orders = [deque([current_hash]) for current_hash in hashes]
+        all_keys = np.broadcast_to(keys, grids.shape)
+        for t in range(1, 5001):
+            grids = engine.step(grids)
+
+            #the keys of the changed cells come out grid by grid, so each grid's are xor'ed together with one reduceat
+            changed = engine.changes().view(bool)
+            counts = np.count_nonzero(changed, axis=(1, 2))
+            moved = counts > 0
+            if moved.any():
+                starts = np.cumsum(counts) - counts
+                hashes[moved] ^= np.bitwise_xor.reduceat(all_keys[changed], starts[moved])
+
+            for k in np.flatnonzero(running):
+                current_hash = hashes[k]
+                history = histories[k]
+                if current_hash in history:
+                    times[indices[k]] = history[current_hash]
+                    periods[indices[k]] = t - history[current_hash]
+                    running[k] = False
+                    continue
+                history[current_hash] = t
+                orders[k].append(current_hash)
+                if len(orders[k]) > max_period:
+                    del history[orders[k].popleft()]
+            if not running.any():
+                break
+
+            #finished grids are still stepped until they make up half the stack, then the stack is compacted
+            if np.count_nonzero(running) <= len(running) // 2:
+                grids = grids[running]
+                indices, hashes = indices[running], hashes[running]
+                histories = [history for history, keep in zip(histories, running) if keep]
+                orders = [order for order, keep in zip(orders, running) if keep]
+                running = running[running]
+                engine = GoLengine.NumpyEngine(self.size, len(running))
+                all_keys = np.broadcast_to(keys, grids.shape)
+        return times, periods
+
+def run_job(args): #one simulation, runs in a worker process
+    index, size, seed = args
+    model = GameofLife(size, rng=np.random.default_rng(seed))
+    time_to_equilibrium, period = model.run_until_equilibrium()
+    return index, time_to_equilibrium, period
+
+def finished_indices(filename):
+    #indices of the simulations already in a data file. a last line cut short by a crash is removed, so the file can
+    #be appended to
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, 'r+') as f:
+        text = f.read()
+        complete = text[:text.rfind('\n') + 1]
+        if len(complete) < len(text):
+            f.truncate(len(complete))
+    lines = complete.splitlines(keepends=True)
+    if len(lines) == 0:
+        return set()
+    if lines[0] != DATA_HEADER:
+        raise ValueError(filename + " was not written with an index column, move it away to start a new run")
+    return {int(line.split('\t')[2]) for line in lines[1:]}
+
+def run_parallel(filename, num_simulations, size, processes, seed=None, sync_interval=10):
+    #the simulations spread over a pool of processes. simulation i gets stream i of SeedSequence(seed).spawn, so with
+    #the same seed it always starts from the same grid. every result is appended to the file as soon as it is back and
+    #the file is synced to disk every sync_interval seconds, so a run that is stopped loses only the simulations in
+    #progress, and running it again carries on with the ones that are missing
+    seed_sequence = np.random.SeedSequence(seed)
+    print("seed: " + str(seed_sequence.entropy) + " (give it again to carry on with the same grids)")
+    finished = finished_indices(filename)
+    seeds = seed_sequence.spawn(num_simulations)
+    jobs = [(i, size, seeds[i]) for i in range(num_simulations) if i not in finished]
+    print(f"{len(finished)} simulations already done, {len(jobs)} to run on {processes} processes")
+
+    time1 = time.time()
+    with open(filename, 'a') as f, Pool(processes) as pool:
+        if f.tell() == 0:
+            f.write(DATA_HEADER)
+        last_sync = time.time()
+        for n, (index, time_to_equilibrium, period) in enumerate(pool.imap_unordered(run_job, jobs)):
+            f.write(f"{time_to_equilibrium}\t{period}\t{index}\n")
+            f.flush()
+            if time.time() - last_sync > sync_interval:
+                os.fsync(f.fileno())
+                last_sync = time.time()
+            if n % 50 == 0:
+                time_left = (time.time() - time1) / (n + 1) * (len(jobs) - (n + 1))
+                print(f"{n + 1}/{len(jobs)} done, estimated time left: {time_left:.0f} s")
+    print(f"total time: {time.time() - time1:.1f} s")
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    mode = str(args[1]) if len(args) > 1 else "ensemble"
+    if len(args) > 4 or mode not in ("ensemble", "sequential", "parallel") or (mode != "parallel" and len(args) > 2):
+        print("GoLpart2.py [ensemble | sequential | parallel [processes] [seed]]")
+        sys.exit(1)
+
+    sequential = mode == "sequential" #one grid at a time instead of the ensemble
+
+    num_simulations = 1000
+    size = 50
+
+    if mode == "parallel": #appends to GoLpart2data.txt as it goes, and carries on from it if it is there
+        processes = int(args[2]) if len(args) > 2 else os.cpu_count()
+        seed = int(args[3]) if len(args) > 3 else None
+        run_parallel('GoLpart2data.txt', num_simulations, size, processes, seed)
+        sys.exit(0)
+
+    equilibration_times = []
+    periods = []
+    
+    total_time = 0
+    if not sequential:
+        time1 = time.time()
+        equilibration_times, periods = GameofLifeEnsemble(size, num_simulations).run_until_equilibrium()
+        total_time = time.time() - time1
+    for i in range(num_simulations if sequential else 0):
+        time1 = time.time()
+        model = GameofLife(size)
+        time_to_equilibrium, period = model.run_until_equilibrium()
+        equilibration_times.append(time_to_equilibrium)
+        periods.append(period)
+        time2 = time.time()
+        part_n_time = time2 - time1
+        total_time += part_n_time
+        time_left = (total_time/(i+1))*(num_simulations - (i+1))
+        if i%2 == 0:
+            print("part " + str(i + 1) + " time: " + str(part_n_time))
+            print("estimated time left: " + str(time_left))
+            print("")
+    
+    print("total time: " + str(total_time))
+    
+    with open('GoLpart2data.txt', 'w') as f:
+        f.write(DATA_HEADER)
+        for i, (e_time, period) in enumerate(zip(equilibration_times, periods)):
+            f.write(f"{e_time}\t{period}\t{i}\n")
+
+    
+
   
\ No newline at end of file
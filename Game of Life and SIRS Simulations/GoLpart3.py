@@ -1,92 +1,152 @@
-import numpy as np
-import copy
-
-
-class GameofLife(object):
-    def __init__(self, size, condition):
-        self.size = size
-        self.grid = np.zeros((size, size))
-        if condition == "random":
-            self.grid = np.random.choice([0, 1], size=(size, size))
-        elif condition == "oscillator":
-            # Blinker oscillator
-            self.grid[size // 2, size // 2 - 1] = 1
-            self.grid[size // 2, size // 2] = 1
-            self.grid[size // 2, size // 2 + 1] = 1
-        elif condition == "glider":
-            # Glider
-            self.grid[size // 2, size // 2 - 1] = 1
-            self.grid[size // 2, size // 2] = 1
-            self.grid[size // 2, size // 2 + 1] = 1
-            self.grid[size // 2 - 1, size // 2 + 1] = 1
-            self.grid[size // 2 - 2, size // 2] = 1
-            
-    def update(self):
-        new_grid = copy.deepcopy(self.grid)
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.grid[i, j] == 1:
-                    if self.neighbours(i, j) < 2 or self.neighbours(i, j) > 3:
-                        new_grid[i, j] = 0
-                elif self.grid[i, j] == 0:
-                    if self.neighbours(i, j) == 3:
-                        new_grid[i, j] = 1
-        self.grid = new_grid
-        
-    
-    def neighbours(self, i, j):
-        neighbours = (self.grid[(i - 1) % self.size, (j - 1) % self.size]
-                    + self.grid[(i - 1) % self.size, j % self.size]
-                    + self.grid[(i - 1) % self.size, (j + 1) % self.size]
-                    + self.grid[i % self.size, (j - 1) % self.size]
-                    + self.grid[i % self.size, (j + 1) % self.size]
-                    + self.grid[(i + 1) % self.size, (j - 1) % self.size]
-                    + self.grid[(i + 1) % self.size, j % self.size]
-                    + self.grid[(i + 1) % self.size, (j + 1) % self.size])
-        return neighbours
-                
-    def centre_of_mass(self):
-        x_point_positions = []
-        y_point_positions = []
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.grid[i, j] == 1:
-                    x_point_positions.append(i)
-                    y_point_positions.append(j)
-        if max(x_point_positions) - min(x_point_positions) < 5 and max(y_point_positions) - min(y_point_positions) < 5:
-            x_com = np.sum(x_point_positions)/len(x_point_positions)
-            y_com = np.sum(y_point_positions)/len(y_point_positions)
-        else:
-            x_com = 0
-            y_com = 0
-        return x_com, y_com    
-        
-    def run(self, nsteps):
-        x_centres_of_mass = []
-        y_centres_of_mass = []
-        steps = []
-        for step in range(nsteps):
-            self.update()
-            if step%4 == 0:
-                x_com, y_com = self.centre_of_mass()
-                if x_com != 0:
-                    steps.append(step)
-                    x_centres_of_mass.append(x_com)
-                    y_centres_of_mass.append(y_com)
-        return steps, x_centres_of_mass, y_centres_of_mass
-
-if __name__ == "__main__":
-    
-    #note: very quick to run
-
-    condition = "glider"
-    size = 50
-    nsteps = 300
-    
-    model = GameofLife(size, condition)
-    steps, x_centres_of_mass, y_centres_of_mass = model.run(nsteps)
-    
-    with open('GoLpart3data.txt', 'w') as f:
-        f.write("steps\tx-axis\ty-axis\n")
-        for i in range(len(steps)):
-            f.write(f"{steps[i]}\t{x_centres_of_mass[i]}\t{y_centres_of_mass[i]}\n")
+import numpy as np
+import sys
+
+import GoLengine
+
+#live cells of the patterns, as (row, column) offsets from the centre of the grid
+PRESETS = {"oscillator": [(0, -1), (0, 0), (0, 1)], # Blinker oscillator
+           "glider": [(0, -1), (0, 0), (0, 1), (-1, 1), (-2, 0)]} # Glider
+
+
+class GliderTracker(object):
+    #centre of mass of the live cells in unwrapped coordinates, so it carries on in a straight line when the glider
+    #crosses the periodic boundary. every live cell keeps the position it was given when it was born, the image of it
+    #nearest the centre of mass at the time, and the sum of the positions is updated from the cells that are born and
+    #die each step. positions are integers relative to the first live cell, so they stay exact far from the origin
+    def __init__(self, size, periodic, cells):
+        self.size = size
+        self.periodic = periodic #False for the unbounded engines, where nothing wraps
+        self.anchor = (int(cells[0][0]), int(cells[0][1])) if len(cells) > 0 else (0, 0)
+        self.positions = {} #(row, column) of a live cell: its unwrapped position relative to the anchor
+        self.total = [0, 0]
+        self.update(cells, [])
+        #least squares fit of the centre of mass against time, kept as running sums relative to the first record
+        self.start = None
+        self.fit_sums = np.zeros(7) #n, t, t^2, x, t x, y, t y
+
+    def update(self, born, died): #(n, 2) arrays of the (row, column) of the cells born and the cells that died
+        for cell in map(tuple, np.asarray(died).reshape(-1, 2).tolist()):
+            position = self.positions.pop(cell)
+            self.total = [self.total[0] - position[0], self.total[1] - position[1]]
+        born = np.asarray(born).reshape(-1, 2)
+        if len(born) == 0:
+            return
+        positions = born - np.array(self.anchor)
+        if self.periodic: #the image nearest the centre of mass
+            positions -= self.size * np.round((positions - np.array(self.relative_centre())) / self.size).astype(positions.dtype)
+        positions = positions.tolist()
+        self.positions.update(zip(map(tuple, born.tolist()), positions))
+        self.total = [self.total[0] + sum(p[0] for p in positions), self.total[1] + sum(p[1] for p in positions)]
+
+    def relative_centre(self): #centre of mass relative to the anchor
+        if len(self.positions) == 0:
+            return (0.0, 0.0)
+        return (self.total[0] / len(self.positions), self.total[1] / len(self.positions))
+
+    def centre_of_mass(self):
+        x_com, y_com = self.relative_centre()
+        return self.anchor[0] + x_com, self.anchor[1] + y_com
+
+    def record(self, step): #adds the centre of mass now to the velocity fit
+        x_com, y_com = self.relative_centre()
+        if self.start is None:
+            self.start = (step, x_com, y_com)
+        t, x, y = step - self.start[0], x_com - self.start[1], y_com - self.start[2]
+        self.fit_sums += [1, t, t ** 2, x, t * x, y, t * y]
+
+    def velocity(self): #(x, y) velocity from the least squares fit so far, nan until there are two records
+        n, t, t2, x, tx, y, ty = self.fit_sums
+        denominator = n * t2 - t ** 2
+        if denominator == 0:
+            return float('nan'), float('nan')
+        return (n * tx - t * x) / denominator, (n * ty - t * y) / denominator
+
+
+class GameofLife(object):
+    def __init__(self, size, condition, engine='numpy'):
+        self.size = size
+        self.engine = GoLengine.get_engine(engine)(size) #stepping engine from GoLengine.py
+        self.generation = 0
+        if condition == "random":
+            self.grid = np.random.choice([0, 1], size=(size, size))
+        else:
+            cells = [(size // 2 + i, size // 2 + j) for i, j in PRESETS.get(condition, [])]
+            if hasattr(self.engine, 'set_cells'): #the sparse engines keep the live cells themselves, so there is no grid
+                self.engine.set_cells(cells)
+                self.grid = None
+            else:
+                self.grid = np.zeros((size, size), dtype=np.uint8)
+                for i, j in cells:
+                    self.grid[i, j] = 1
+        self.tracker = GliderTracker(size, getattr(self.engine, 'periodic', True), self.live_cells())
+            
+    def update(self):
+        if self.grid is None:
+            self.engine.advance()
+        else:
+            self.grid = self.engine.step(self.grid)
+        #the engine says which cells were born and died, from its two buffers or its old and new live cells
+        self.tracker.update(*self.engine.changed_cells())
+        self.generation += 1
+
+    def skip(self, generations): #jumps ahead without measuring, in a few calls for the hashlife engine
+        if self.grid is None:
+            self.engine.advance(generations)
+            self.generation += generations
+            self.tracker = GliderTracker(self.size, self.tracker.periodic, self.live_cells()) #can only start again from here
+        else:
+            for step in range(generations):
+                self.update()
+    
+    def live_cells(self): #(row, column) of every live cell
+        if self.grid is None:
+            return self.engine.cells()
+        return np.argwhere(self.grid == 1)
+                
+    def centre_of_mass(self):
+        return self.tracker.centre_of_mass()
+        
+    def run(self, nsteps):
+        #centre of mass every 4 steps, with the velocity fitted to all of them so far
+        x_centres_of_mass = []
+        y_centres_of_mass = []
+        velocities = []
+        steps = []
+        for step in range(nsteps):
+            self.update()
+            if step%4 == 0:
+                x_com, y_com = self.centre_of_mass()
+                self.tracker.record(self.generation - 1)
+                steps.append(self.generation - 1)
+                x_centres_of_mass.append(x_com)
+                y_centres_of_mass.append(y_com)
+                velocities.append(self.tracker.velocity())
+        return steps, x_centres_of_mass, y_centres_of_mass, velocities
+
+if __name__ == "__main__":
+    
+    #note: very quick to run
+    
+    # Read optional input arguments
+    args = sys.argv
+    
+    if len(args) > 4 or (len(args) > 1 and args[1] not in GoLengine.ENGINES):
+        print("GoLpart3.py [engine] [size] [start]")
+        sys.exit(1)
+    
+    engine = str(args[1]) if len(args) > 1 else 'numpy' #'sparse' or 'unbounded' for grids too big to hold as an array
+    size = int(args[2]) if len(args) > 2 else 50
+    start = int(args[3]) if len(args) > 3 else 0 #generations to skip before tracking, e.g. 2**60 with 'hashlife'
+
+    condition = "glider"
+    nsteps = 300
+    
+    model = GameofLife(size, condition, engine)
+    model.skip(start)
+    steps, x_centres_of_mass, y_centres_of_mass, velocities = model.run(nsteps)
+    print(f"velocity: {velocities[-1][0]:.6f}, {velocities[-1][1]:.6f} cells per step")
+    
+    with open('GoLpart3data.txt', 'w') as f:
+        f.write("steps\tx-axis\ty-axis\tx-velocity\ty-velocity\n")
+        for i in range(len(steps)):
+            f.write(f"{steps[i]}\t{x_centres_of_mass[i]}\t{y_centres_of_mass[i]}\t{velocities[i][0]}\t{velocities[i][1]}\n")
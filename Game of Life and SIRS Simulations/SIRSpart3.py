@@ -1,101 +1,127 @@
-import numpy as np
-import random
-
-
-
-class SIRS(object):
-    def __init__(self, size, p1, p2, p3):
-        self.size = size
-        self.p1 = p1
-        self.p2 = p2
-        self.p3 = p3
-        self.lattice = np.random.choice([-1, 0, 1], size=(size, size))
-        #I (infected) = -1
-        #S (suscpetible) = 0
-        #R (recovered) = 1
-    
-    def update(self):
-        #pick random site (i,j)
-        i = random.randint(0, self.size - 1)
-        j = random.randint(0, self.size - 1)
-        
-        if self.lattice[i, j] == 0 and random.random() < self.p1 and -1 in self.nearest_neighbours(i, j):  
-            self.lattice[i, j] = -1 
-        elif self.lattice[i,j] == -1 and random.random() < self.p2:
-            self.lattice[i,j] = 1
-        elif self.lattice[i,j] == 1 and random.random() < self.p3:
-            self.lattice[i,j] = 0
-    
-    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
-        return [self.lattice[(i+1)%self.size, j],
-                self.lattice[(i-1)%self.size, j],
-                self.lattice[i, (j+1)%self.size],
-                self.lattice[i, (j-1)%self.size]]
-                
-    def infected_sites(self):
-        infected_sites = 0
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.lattice[i,j] == -1:
-                    infected_sites += 1
-        return infected_sites
-        
-    def sweep(self):
-        for n in range(self.size ** 2):
-            self.update()
-            
-    def animate(self, frame, im):
-        self.sweep()
-        im.set_array(self.lattice)
-        return im,
-         
-    def run(self, nsweeps):
-        #list to store variables
-        infected_sites = []
-        
-        for n in range(nsweeps):
-            self.sweep()
-            if n > 100: #wait 100 sweeps for equilibration
-                infected_sites.append(self.infected_sites()) #store appropriate variable
-        
-        N = self.size**2
-        average_fraction_infected_sites = np.mean(infected_sites)/N
-        return average_fraction_infected_sites
-    
-    
-
-if __name__ == "__main__":
-    
-    #note: approx 1.5 hours
-    size = 50
-    nsweeps = 1000
-    p2 = 0.5
-    resolution = 0.05    
-    
-    
-    p_values = np.arange(0, 1, resolution)
-    colour_plot_values = np.empty((len(p_values),len(p_values)))
-
-    
-
-    for i in range(len(p_values)):
-
-        for j in range(len(p_values)):
-
-            p1 = p_values[j]
-            p3 = p_values[i]
-            model = SIRS(size, p1, p2, p3)
-            colour_plot_values[len(p_values)-1-i,j] = model.run(nsweeps)
-
-        
-
-    with open('SIRSpart3data.txt', 'w') as f:
-        for i in range(len(p_values)):
-            for j in range(len(p_values)):
-                    f.write(f"{colour_plot_values[i,j]}\t")
-            f.write("\n")
-    
-    
-    
-
-
+import numpy as np
+import random
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared Modules'))
+import backends
+import instrumentation
+
+
+
+class SIRS(object):
+    def __init__(self, size, p1, p2, p3, backend='numba', seed=None, stats=None):
+        self.size = size
+        self.p1 = p1
+        self.p2 = p2
+        self.p3 = p3
+        self.backend = backends.get_backend(backend) #'numba' (whole sweeps compiled, 'numpy' without numba), 'numpy' or 'python' kernel for sweeps
+        self.rng = np.random.default_rng(seed) #random numbers for the numpy and numba kernels
+        self.stats = stats #optional instrumentation.RunStats, collecting phase times and how many updates change a site
+        self.lattice = np.random.choice([-1, 0, 1], size=(size, size))
+        #I (infected) = -1
+        #S (suscpetible) = 0
+        #R (recovered) = 1
+    
+    def update(self):
+        #pick random site (i,j)
+        i = random.randint(0, self.size - 1)
+        j = random.randint(0, self.size - 1)
+        
+        if self.lattice[i, j] == 0 and random.random() < self.p1 and -1 in self.nearest_neighbours(i, j):  
+            self.lattice[i, j] = -1 
+            return True #the site changed, for the run statistics
+        elif self.lattice[i,j] == -1 and random.random() < self.p2:
+            self.lattice[i,j] = 1
+            return True
+        elif self.lattice[i,j] == 1 and random.random() < self.p3:
+            self.lattice[i,j] = 0
+            return True
+    
+    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
+        return [self.lattice[(i+1)%self.size, j],
+                self.lattice[(i-1)%self.size, j],
+                self.lattice[i, (j+1)%self.size],
+                self.lattice[i, (j-1)%self.size]]
+                
+    def infected_sites(self):
+        return np.count_nonzero(self.lattice == -1)
+        
+    def sweep(self):
+        changed = self.backend.sirs_sweep(self)
+        if self.stats is not None: #an update counts as accepted when it changes the state of the site
+            self.stats.count_sweep(self.size ** 2, changed)
+            
+    def animate(self, frame, im):
+        self.sweep()
+        im.set_array(self.lattice)
+        return im,
+         
+    def run(self, nsweeps):
+        #list to store variables
+        infected_sites = []
+        if self.stats is not None:
+            self.stats.start(nsweeps)
+        
+        for n in range(nsweeps):
+            self.sweep()
+            if n > 100: #wait 100 sweeps for equilibration
+                with instrumentation.timer(self.stats, 'measure'):
+                    infected_sites.append(self.infected_sites()) #store appropriate variable
+        
+        if self.stats is not None:
+            self.stats.stop()
+        
+        N = self.size**2
+        average_fraction_infected_sites = np.mean(infected_sites)/N
+        return average_fraction_infected_sites
+    
+    
+
+if __name__ == "__main__":
+    
+    # Read optional input arguments
+    args = sys.argv
+    
+    if len(args) > 2 or (len(args) > 1 and args[1] != '--profile'):
+        print("SIRSpart3.py [--profile]")
+        sys.exit(1)
+    
+    profile = len(args) > 1 #print phase times and how often updates change a site for each model
+    
+    #note: approx 1.5 hours with the python backend, about 30 seconds with numba
+    size = 50
+    nsweeps = 1000
+    p2 = 0.5
+    resolution = 0.05    
+    
+    
+    p_values = np.arange(0, 1, resolution)
+    colour_plot_values = np.empty((len(p_values),len(p_values)))
+
+    
+
+    for i in range(len(p_values)):
+
+        for j in range(len(p_values)):
+
+            p1 = p_values[j]
+            p3 = p_values[i]
+            stats = instrumentation.RunStats(30, f"p1 = {p1:.2f}, p3 = {p3:.2f}: ") if profile else None
+            model = SIRS(size, p1, p2, p3, stats=stats)
+            colour_plot_values[len(p_values)-1-i,j] = model.run(nsweeps)
+            if profile:
+                print(stats.report())
+
+        
+
+    with open('SIRSpart3data.txt', 'w') as f:
+        for i in range(len(p_values)):
+            for j in range(len(p_values)):
+                    f.write(f"{colour_plot_values[i,j]}\t")
+            f.write("\n")
+    
+    
+    
+
+
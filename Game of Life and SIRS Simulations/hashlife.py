@@ -0,0 +1,335 @@
+import numpy as np
+import sys
+
+#hashlife (gosper's algorithm) for the game of life. the universe is a quadtree in which every distinct square of
+#cells is stored once (hash consing), and the result of a node - its centre advanced 2^j generations - is memoized
+#on the node, so patterns that repeat in space or time can be advanced 2^k generations in about the time of k steps.
+#the universe is either an unbounded plane or, for power of two sizes, a periodic grid like the other engines.
+#the table of nodes is garbage collected whenever it grows past max_nodes, keeping only the current universe
+
+class Node(object):
+    #a 2^level x 2^level square: a single cell at level 0, otherwise four quadrants one level down
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', 'results')
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+        self.results = None #j: centre of the node 2^j generations later, filled in by HashLife.successor
+
+class TableFull(Exception): #raised by join to give up a periodic jump too big for the node table
+    pass
+
+class HashLife(object):
+    def __init__(self, size=None, periodic=False, max_nodes=1000000):
+        self.size = size #the window shown by step(grid) on the plane, or the period of a periodic grid
+        self.periodic = periodic
+        if periodic and (size is None or size < 4 or size & (size - 1) != 0):
+            raise ValueError("a periodic HashLife grid needs a power of two size of at least 4, got " + str(size))
+        self.max_nodes = max_nodes #the table is garbage collected when it holds more nodes than this
+        self.collect_at = max_nodes
+        self.collections = 0
+        self.give_up_when_full = False #raise TableFull instead of collecting, set during a periodic jump
+        self.table = {} #(nw, ne, sw, se): node, for every node above level 0
+        self.dead = Node(0, None, None, None, None, 0)
+        self.alive = Node(0, None, None, None, None, 1)
+        self.empty_nodes = [self.dead] #empty node of every level
+        self.generation = 0
+        self.grid = None #dense window handed back by step
+        self.set_cells(np.empty((0, 2), dtype=np.int64))
+
+    def join(self, nw, ne, sw, se): #the unique node with these quadrants
+        key = (nw, ne, sw, se)
+        node = self.table.get(key)
+        if node is None:
+            node = Node(nw.level + 1, nw, ne, sw, se, nw.population + ne.population + sw.population + se.population)
+            self.table[key] = node
+            if len(self.table) > self.collect_at:
+                if self.give_up_when_full:
+                    raise TableFull
+                self.collect()
+        return node
+
+    def empty(self, level):
+        while len(self.empty_nodes) <= level:
+            e = self.empty_nodes[-1]
+            self.empty_nodes.append(self.join(e, e, e, e))
+        return self.empty_nodes[level]
+
+    def centre(self, node): #node in the middle of an empty node one level up
+        e = self.empty(node.level - 1)
+        return self.join(self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+                         self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+
+    def inner(self, node): #the middle of a node, one level down
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def collect(self):
+        #keeps the nodes of the current universe and the empty nodes, and forgets every other node along with the
+        #memoized results that point to them. nodes still in use by a successor in progress stay valid, they are
+        #just no longer shared
+        marked = set()
+        stack = [self.root, self.previous_root, self.alive] + self.empty_nodes
+        while stack:
+            node = stack.pop()
+            if node in marked:
+                continue
+            marked.add(node)
+            if node.level > 0:
+                stack.extend((node.nw, node.ne, node.sw, node.se))
+        self.table = {key: node for key, node in self.table.items() if node in marked}
+        for node in marked:
+            if node.results:
+                node.results = {j: result for j, result in node.results.items() if result in marked} or None
+        self.collect_at = max(self.max_nodes, 2 * len(self.table)) #do not collect again at once if the universe itself is big
+        self.collections += 1
+
+    def base_result(self, node): #centre 2 x 2 of a level 2 node one generation later
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        cells = [[leaf.population for leaf in row] for row in [[nw.nw, nw.ne, ne.nw, ne.ne], [nw.sw, nw.se, ne.sw, ne.se],
+                                                              [sw.nw, sw.ne, se.nw, se.ne], [sw.sw, sw.se, se.sw, se.se]]]
+        new_cells = []
+        for r, c in [(1, 1), (1, 2), (2, 1), (2, 2)]:
+            neighbours = sum(cells[r + dr][c + dc] for dr in (-1, 0, 1) for dc in (-1, 0, 1)) - cells[r][c]
+            new_cells.append(self.alive if neighbours == 3 or (neighbours == 2 and cells[r][c]) else self.dead)
+        return self.join(*new_cells)
+
+    def successor(self, node, j):
+        #centre of a level k node (level k-1) advanced 2^j generations, for j <= k-2
+        j = min(j, node.level - 2)
+        if node.results is not None and j in node.results:
+            return node.results[j]
+        if node.population == 0:
+            result = self.empty(node.level - 1)
+        elif node.level == 2:
+            result = self.base_result(node)
+        else:
+            #the nine overlapping level k-1 squares, each advanced 2^j generations (or 2^(j-1) when j = k-2)
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            squares = [nw, self.join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                       self.join(nw.sw, nw.se, sw.nw, sw.ne), self.join(nw.se, ne.sw, sw.ne, se.nw), self.join(ne.sw, ne.se, se.nw, se.ne),
+                       sw, self.join(sw.ne, se.nw, sw.se, se.sw), se]
+            c1, c2, c3, c4, c5, c6, c7, c8, c9 = [self.successor(square, j) for square in squares]
+            if j < node.level - 2: #already advanced 2^j, the centre is pieced together from the nine results
+                result = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw), self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                                   self.join(c4.se, c5.sw, c7.ne, c8.nw), self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else: #advanced 2^(k-3), so four more successors advance them another 2^(k-3)
+                result = self.join(self.successor(self.join(c1, c2, c4, c5), j), self.successor(self.join(c2, c3, c5, c6), j),
+                                   self.successor(self.join(c4, c5, c7, c8), j), self.successor(self.join(c5, c6, c8, c9), j))
+        if node.results is None:
+            node.results = {}
+        node.results[j] = result
+        return result
+
+    def build(self, level, rows, columns): #node for the cells in [0, 2^level) x [0, 2^level)
+        if len(rows) == 0:
+            return self.empty(level)
+        if level == 0:
+            return self.alive
+        half = 2 ** (level - 1)
+        top = rows < half
+        left = columns < half
+        return self.join(self.build(level - 1, rows[top & left], columns[top & left]),
+                         self.build(level - 1, rows[top & ~left], columns[top & ~left] - half),
+                         self.build(level - 1, rows[~top & left] - half, columns[~top & left]),
+                         self.build(level - 1, rows[~top & ~left] - half, columns[~top & ~left] - half))
+
+    def set_cells(self, cells): #cells is an (n, 2) array of the (row, column) of every live cell
+        cells = np.unique(np.asarray(cells, dtype=np.int64).reshape(-1, 2), axis=0)
+        if self.periodic: #the root is the grid itself, [0, size) x [0, size)
+            cells = np.unique(cells % self.size, axis=0)
+            self.root = self.build(self.size.bit_length() - 1, cells[:, 0], cells[:, 1])
+        else: #the root is centred on the origin, [-2^(level-1), 2^(level-1)) in both directions
+            level = 3
+            while len(cells) > 0 and (np.min(cells) < -2 ** (level - 1) or np.max(cells) >= 2 ** (level - 1)):
+                level += 1
+            self.root = self.build(level, cells[:, 0] + 2 ** (level - 1), cells[:, 1] + 2 ** (level - 1))
+        self.previous_root = self.root #the universe before the last advance
+
+    def cells(self):
+        cells = []
+        offset = 0 if self.periodic else -2 ** (self.root.level - 1)
+        stack = [(self.root, offset, offset)]
+        while stack:
+            node, row, column = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                cells.append((row, column))
+                continue
+            half = 2 ** (node.level - 1)
+            stack.extend([(node.nw, row, column), (node.ne, row, column + half),
+                          (node.sw, row + half, column), (node.se, row + half, column + half)])
+        return self.cell_array(cells)
+
+    def cell_array(self, cells): #sorted (n, 2) array, of python integers once the universe is too big for int64
+        cells.sort()
+        return np.array(cells, dtype=np.int64 if self.root.level < 63 else object).reshape(-1, 2)
+
+    def changed_cells(self):
+        #cells born and cells that died in the last advance. the two universes are walked together, and as every
+        #distinct square is stored once, a quadrant that is the same node in both is skipped, so the cost goes with
+        #the number of changes rather than the population
+        old, new = self.previous_root, self.root
+        while old.level < new.level:
+            old = self.centre(old)
+        while new.level < old.level:
+            new = self.centre(new)
+        born, died = [], []
+        offset = 0 if self.periodic else -2 ** (new.level - 1)
+        stack = [(old, new, offset, offset)]
+        while stack:
+            old, new, row, column = stack.pop()
+            if old is new:
+                continue
+            if new.level == 0:
+                (born if new.population else died).append((row, column))
+                continue
+            half = 2 ** (new.level - 1)
+            stack.extend([(old.nw, new.nw, row, column), (old.ne, new.ne, row, column + half),
+                          (old.sw, new.sw, row + half, column), (old.se, new.se, row + half, column + half)])
+        return self.cell_array(born), self.cell_array(died)
+
+    def population(self):
+        return self.root.population
+
+    def advance(self, nsteps=1):
+        #advances the universe nsteps generations, one power of two at a time
+        self.generation += nsteps
+        self.previous_root = self.root
+        tile = True
+        while nsteps > 0:
+            j = nsteps.bit_length() - 1
+            if self.periodic and j > self.root.level and tile:
+                #a jump further than the grid is wide needs the tiled grid of that size, which for a chaotic pattern
+                #can be more than the table holds. collecting in the middle would throw away the results it is built
+                #from, so it is given up instead and the rest of this advance goes a grid's width at a time
+                if len(self.table) > self.collect_at // 2:
+                    self.collect()
+                try:
+                    self.give_up_when_full = True
+                    self.root = self.periodic_jump(j)
+                except TableFull:
+                    tile = False
+                    continue
+                finally:
+                    self.give_up_when_full = False
+            elif self.periodic:
+                j = min(j, self.root.level)
+                self.root = self.periodic_jump(j)
+            else:
+                #pad with empty space until nothing can reach the edge of the result in 2^j generations
+                for n in range(max(self.root.level, j + 1) + 2 - self.root.level):
+                    self.root = self.centre(self.root)
+                self.root = self.successor(self.root, j)
+                while self.root.level > 3 and self.inner(self.root).population == self.root.population:
+                    self.root = self.inner(self.root)
+            nsteps -= 2 ** j
+
+    def periodic_jump(self, j):
+        #the grid tiled into a square at least 2^j across is the same periodic universe, and that tiled 4 x 4 is a
+        #node two levels up whose centre, advanced 2^j, holds it tiled again, so any corner of the grid's size is the
+        #grid advanced. the tiles are all the same node, so tiling costs one join per level, and for a pattern that
+        #repeats the successor is mostly memoized, which makes the jump about as quick as on the plane
+        tiled = self.root
+        while tiled.level < j:
+            tiled = self.join(tiled, tiled, tiled, tiled)
+        tiles = self.join(tiled, tiled, tiled, tiled)
+        result = self.successor(self.join(tiles, tiles, tiles, tiles), j).nw
+        while result.level > self.root.level:
+            result = result.nw
+        return result
+
+    def advance_power(self, k): #advances 2^k generations in one call
+        self.advance(2 ** k)
+
+    def from_grid(self, grid): #from a numpy grid, with the corner cell at (0, 0)
+        self.set_cells(np.argwhere(grid == 1))
+
+    def to_grid(self, size=None, origin=(0, 0)): #size x size numpy grid of the universe, starting at origin
+        size = self.size if size is None else size
+        grid = np.zeros((size, size), dtype=np.uint8)
+        cells = self.cells() - np.array(origin)
+        cells = cells[np.all((cells >= 0) & (cells < size), axis=1)]
+        grid[cells[:, 0], cells[:, 1]] = 1
+        return grid
+
+    def step(self, grid): #dense drop-in for the other engines in GoLengine.py, showing the size x size window
+        if grid is not self.grid:
+            self.from_grid(grid)
+        self.advance()
+        self.grid = self.to_grid()
+        return self.grid
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 2:
+        print("hashlife.py [max_nodes]")
+        sys.exit(1)
+
+    max_nodes = int(args[1]) if len(args) > 1 else 1000000
+
+    import time
+    import GoLengine
+
+    #a periodic grid must agree with the numpy engine, and the plane with the unbounded sparse engine
+    size = 64
+    grid = np.random.choice([0, 1], size=(size, size))
+    hashlife = HashLife(size, periodic=True, max_nodes=max_nodes)
+    hashlife.from_grid(grid)
+    numpy_engine = GoLengine.get_engine('numpy')(size)
+    numpy_grid = grid
+    for n in [1, 1, 2, 5, 27, 100, 864]: #to generation 1000 in uneven jumps
+        hashlife.advance(n)
+        for step in range(n):
+            numpy_grid = numpy_engine.step(numpy_grid)
+        if not np.array_equal(hashlife.to_grid(), numpy_grid):
+            raise RuntimeError("periodic hashlife disagrees with the numpy engine at generation " + str(hashlife.generation))
+    print(f"periodic hashlife agrees with the numpy engine on a random {size} x {size} grid to generation {hashlife.generation}")
+
+    #a glider on a periodic grid is back where it started every 4 x size generations, however far it is jumped
+    hashlife = HashLife(size, periodic=True, max_nodes=max_nodes)
+    hashlife.set_cells([(10, 9), (10, 10), (10, 11), (9, 11), (8, 10)])
+    start = hashlife.to_grid()
+    time1 = time.perf_counter()
+    hashlife.advance(4 * size * 2 ** 90)
+    if not np.array_equal(hashlife.to_grid(), start):
+        raise RuntimeError("periodic hashlife glider is not back where it started")
+    print(f"periodic hashlife glider back where it started after 2^{(4 * size * 2 ** 90).bit_length() - 1} generations, "
+          f"time: {time.perf_counter() - time1:.2f} s")
+
+    hashlife = HashLife(max_nodes=max_nodes)
+    hashlife.set_cells(np.argwhere(np.random.choice([0, 1], size=(32, 32))))
+    sparse_engine = GoLengine.get_engine('unbounded')(32)
+    sparse_engine.set_cells(hashlife.cells())
+    hashlife.advance(1000)
+    sparse_engine.advance(1000)
+    if not np.array_equal(hashlife.cells(), sparse_engine.cells()):
+        raise RuntimeError("hashlife disagrees with the unbounded sparse engine")
+    print(f"hashlife agrees with the unbounded sparse engine on a 32 x 32 soup after 1000 generations ({hashlife.population()} cells)")
+
+    #a glider moves one cell diagonally every 4 generations, so after 2^k generations it has moved 2^(k-2) cells
+    hashlife = HashLife(max_nodes=max_nodes)
+    hashlife.set_cells([(0, -1), (0, 0), (0, 1), (-1, 1), (-2, 0)])
+    start = np.mean(hashlife.cells(), axis=0)
+    time1 = time.perf_counter()
+    for k in range(2, 101, 14):
+        hashlife.advance(2 ** k - hashlife.generation)
+        velocity = (np.mean(hashlife.cells(), axis=0) - start) / hashlife.generation
+        print(f"generation 2^{k}: velocity of the centre of mass {velocity}, {len(hashlife.table)} nodes")
+    print(f"time: {time.perf_counter() - time1:.2f} s")
+
+    #a long run of a random soup, where most of the time goes into the first few thousand generations
+    hashlife = HashLife(max_nodes=max_nodes)
+    hashlife.set_cells(np.argwhere(np.random.choice([0, 1], size=(64, 64))))
+    time1 = time.perf_counter()
+    hashlife.advance(2 ** 20)
+    print(f"64 x 64 soup after 2^20 generations: {hashlife.population()} cells, {len(hashlife.table)} nodes, "
+          f"{hashlife.collections} garbage collections, time: {time.perf_counter() - time1:.1f} s")
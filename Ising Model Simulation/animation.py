@@ -1,115 +1,197 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Feb  2 17:21:59 2024
-
-@author: eccwi
-"""
-
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import random
-import sys
-
-class IsingModel(object):
-    def __init__(self, size, temperature, dynamics, lattice):
-        self.size = size
-        self.temperature = temperature
-        self.dynamics = dynamics
-        self.lattice = lattice
-
-    def glauber_update(self):
-        #pick random site (i,j)
-        i = random.randint(0, self.size - 1)
-        j = random.randint(0, self.size - 1)
-        
-        delta_E = self.delta_E(i,j) #find change in energy
-        
-        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #glauber conditions for updating lattice  
-            self.lattice[i, j] *= -1 #flip the sign of the randomly chosen site
-    
-    def kawasaki_update(self):
-        #pick random sites (i1, j1) and (i2, j2)
-        i1 = random.randint(0, self.size - 1)
-        j1 = random.randint(0, self.size - 1)
-        i2 = random.randint(0, self.size - 1)
-        j2 = random.randint(0, self.size - 1)
-        
-        while self.lattice[i1, j1] == self.lattice[i2, j2]: #if the two sites have the same sign, repick until they are different
-            i1 = random.randint(0, self.size - 1)
-            j1 = random.randint(0, self.size - 1)
-            i2 = random.randint(0, self.size - 1)
-            j2 = random.randint(0, self.size - 1)
-        
-        #if the two sites are nearest neighbours, include a nearest neighbour correction to avoid over counting in energy change
-        if [i1, j1] in [[(i2+1)%self.size, j2], [(i2-1)%self.size, j2], [i2, (j2+1)%self.size], [i2, (j2-1)%self.size]]:
-           nearest_neighbour_correction = 2 * self.lattice[i1, j1] * self.lattice[i2, j2]
-        else:
-            nearest_neighbour_correction = 0
-        
-        delta_E = self.delta_E(i1,j1) + self.delta_E(i2,j2) - nearest_neighbour_correction #find change in energy 
-        
-        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #kawasaki conditions for updating lattice
-            self.lattice[i1, j1], self.lattice[i2, j2] = self.lattice[i2, j2], self.lattice[i1, j1] #switch the signs of the two sites
-    
-    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
-        return [self.lattice[(i+1)%self.size, j],
-                self.lattice[(i-1)%self.size, j],
-                self.lattice[i, (j+1)%self.size],
-                self.lattice[i, (j-1)%self.size]]
-    
-    def delta_E(self, i, j): #finds change in energy if the sign of a site is flipped
-        return 2 * self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
-    
-    def sweep(self):
-        for n in range(self.size ** 2):
-            if self.dynamics == 'Glauber':
-                self.glauber_update()
-            elif self.dynamics == 'Kawasaki':
-                self.kawasaki_update()
-                
-    
-    def animate(self, frame, im):
-        self.sweep()
-        im.set_array(self.lattice)
-        return im,
-         
-    def run(self, nsteps, frequency):
-        norm = plt.Normalize(vmin=-1, vmax=1)
-        fig, ax = plt.subplots()
-        im = ax.imshow(self.lattice,norm=norm)
-
-        self.anim = animation.FuncAnimation(fig, self.animate, fargs = (im,), frames = nsteps, interval=frequency)
-        plt.show()
-
-
-if __name__ == "__main__":
-    
-    # Read input arguments
-    args = sys.argv
-    
-    if (len(args) != 6):
-        print("animation.py size temperature dynamics nsteps frequency")
-        sys.exit(1)
-        
-    size = int(args[1])
-    temperature = float(args[2])
-    dynamics = str(args[3])
-    nsteps = int(args[4])
-    frequency = int(args[5])
-
-    
-    r = random.random()
-    if dynamics == 'Glauber':
-        if r < 0.5: s = 1
-        else: s = -1
-        lattice = (np.full((size, size), s))
-    elif dynamics == 'Kawasaki':
-        if r < 0.25: lattice = np.concatenate((np.full((size, int(size/2)), 1), np.full((size, int(size/2)), -1)), axis=1)
-        elif r < 0.5: lattice = np.concatenate((np.full((size, int(size/2)), -1), np.full((size, int(size/2)), 1)), axis=1)
-        elif r < 0.75: lattice = np.concatenate((np.full((int(size/2), size), 1), np.full((int(size/2), size), -1)), axis=0)
-        else: lattice = np.concatenate((np.full((int(size/2), size), -1), np.full((int(size/2), size), 1)), axis=0)
-    
-    model = IsingModel(size, temperature, dynamics, lattice)
-    model.run(nsteps, frequency)
-
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Feb  2 17:21:59 2024
+
+@author: eccwi
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+import random
+import sys
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+class IsingModel(object):
+    def __init__(self, size, temperature, dynamics, lattice):
+        self.size = size
+        self.temperature = temperature
+        self.dynamics = dynamics
+        self.lattice = lattice
+        
+        if dynamics == 'Checkerboard':
+            #red/black sublattices only stay independent across the periodic boundary if the size is even
+            if size % 2 != 0:
+                raise ValueError("Checkerboard dynamics needs an even lattice size, got " + str(size))
+            parity = np.add.outer(np.arange(size), np.arange(size)) % 2
+            self.sublattices = [parity == 0, parity == 1] #red sites (i+j even) and black sites (i+j odd)
+            self.acceptance = np.minimum(1, np.exp(-np.arange(-8, 9) / temperature)) #metropolis acceptance indexed by delta_E + 8
+        
+        if dynamics == 'Wolff' or dynamics == 'SwendsenWang':
+            #flat indices i*size + j of the four nearest neighbours of every site
+            i, j = np.divmod(np.arange(size ** 2), size)
+            self.neighbour_table = np.stack([((i+1)%size) * size + j, ((i-1)%size) * size + j,
+                                             i * size + (j+1)%size, i * size + (j-1)%size], axis=1)
+
+    def glauber_update(self):
+        #pick random site (i,j)
+        i = random.randint(0, self.size - 1)
+        j = random.randint(0, self.size - 1)
+        
+        delta_E = self.delta_E(i,j) #find change in energy
+        
+        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #glauber conditions for updating lattice  
+            self.lattice[i, j] *= -1 #flip the sign of the randomly chosen site
+    
+    def kawasaki_update(self):
+        #pick random sites (i1, j1) and (i2, j2)
+        i1 = random.randint(0, self.size - 1)
+        j1 = random.randint(0, self.size - 1)
+        i2 = random.randint(0, self.size - 1)
+        j2 = random.randint(0, self.size - 1)
+        
+        while self.lattice[i1, j1] == self.lattice[i2, j2]: #if the two sites have the same sign, repick until they are different
+            i1 = random.randint(0, self.size - 1)
+            j1 = random.randint(0, self.size - 1)
+            i2 = random.randint(0, self.size - 1)
+            j2 = random.randint(0, self.size - 1)
+        
+        #if the two sites are nearest neighbours, include a nearest neighbour correction to avoid over counting in energy change
+        if [i1, j1] in [[(i2+1)%self.size, j2], [(i2-1)%self.size, j2], [i2, (j2+1)%self.size], [i2, (j2-1)%self.size]]:
+           nearest_neighbour_correction = 4 * self.lattice[i1, j1] * self.lattice[i2, j2] #the bond between the two sites is counted once in each delta_E but does not change
+        else:
+            nearest_neighbour_correction = 0
+        
+        delta_E = self.delta_E(i1,j1) + self.delta_E(i2,j2) - nearest_neighbour_correction #find change in energy 
+        
+        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #kawasaki conditions for updating lattice
+            self.lattice[i1, j1], self.lattice[i2, j2] = self.lattice[i2, j2], self.lattice[i1, j1] #switch the signs of the two sites
+    
+    def checkerboard_update(self, sublattice):
+        #sum of the four nearest neighbours for every site at once
+        neighbour_sum = (np.roll(self.lattice, 1, axis=0) + np.roll(self.lattice, -1, axis=0)
+                         + np.roll(self.lattice, 1, axis=1) + np.roll(self.lattice, -1, axis=1))
+        delta_E = 2 * self.lattice * neighbour_sum
+        
+        #no two sites of a sublattice are neighbours, so all of them can be updated at once with the glauber conditions
+        flip = sublattice & (np.random.random(self.lattice.shape) < self.acceptance[delta_E + 8])
+        self.lattice[flip] *= -1
+    
+    def wolff_update(self): #grows one wolff cluster from a random site and flips it, returns the size of the cluster
+        p_add = 1 - np.exp(-2 / self.temperature) #probability of adding an aligned neighbour to the cluster
+        flat_lattice = self.lattice.reshape(-1)
+        seed = np.random.randint(self.size ** 2)
+        spin = flat_lattice[seed]
+        in_cluster = np.zeros(self.size ** 2, dtype=bool)
+        in_cluster[seed] = True
+        
+        #grow the cluster one layer at a time from an array of the newest sites, so every bond out of the cluster is tried once
+        frontier = np.array([seed])
+        while len(frontier) > 0:
+            candidates = self.neighbour_table[frontier].ravel()
+            added = candidates[(flat_lattice[candidates] == spin) & ~in_cluster[candidates] & (np.random.random(len(candidates)) < p_add)]
+            frontier = np.unique(added)
+            in_cluster[frontier] = True
+        
+        flat_lattice[in_cluster] = -spin
+        return np.count_nonzero(in_cluster)
+    
+    def wolff_sweep(self): #flip clusters until about as many spins as there are sites have been flipped
+        flipped = 0
+        while flipped < self.size ** 2:
+            flipped += self.wolff_update()
+    
+    def swendsen_wang_update(self): #splits the whole lattice into clusters and flips each one with probability 1/2
+        p_add = 1 - np.exp(-2 / self.temperature)
+        flat_lattice = self.lattice.reshape(-1)
+        sites = np.arange(self.size ** 2)
+        
+        #bond masks to the neighbours at (i+1,j) and (i,j+1), active between aligned spins with probability p_add
+        bond_sites = []
+        bond_neighbours = []
+        for direction in [0, 2]:
+            neighbours = self.neighbour_table[:, direction]
+            active = (flat_lattice == flat_lattice[neighbours]) & (np.random.random(self.size ** 2) < p_add)
+            bond_sites.append(sites[active])
+            bond_neighbours.append(neighbours[active])
+        bond_sites = np.concatenate(bond_sites)
+        bond_neighbours = np.concatenate(bond_neighbours)
+        
+        #clusters are the connected components of the active bonds
+        bonds = coo_matrix((np.ones(len(bond_sites)), (bond_sites, bond_neighbours)), shape=(self.size ** 2, self.size ** 2))
+        number_of_clusters, labels = connected_components(bonds, directed=False)
+        flip = np.random.random(number_of_clusters) < 0.5
+        flat_lattice[flip[labels]] *= -1
+    
+    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
+        return [self.lattice[(i+1)%self.size, j],
+                self.lattice[(i-1)%self.size, j],
+                self.lattice[i, (j+1)%self.size],
+                self.lattice[i, (j-1)%self.size]]
+    
+    def delta_E(self, i, j): #finds change in energy if the sign of a site is flipped
+        return 2 * self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
+    
+    def sweep(self):
+        if self.dynamics == 'Checkerboard': #update every red site then every black site
+            for sublattice in self.sublattices:
+                self.checkerboard_update(sublattice)
+            return
+        if self.dynamics == 'Wolff':
+            self.wolff_sweep()
+            return
+        if self.dynamics == 'SwendsenWang':
+            self.swendsen_wang_update()
+            return
+        for n in range(self.size ** 2):
+            if self.dynamics == 'Glauber':
+                self.glauber_update()
+            elif self.dynamics == 'Kawasaki':
+                self.kawasaki_update()
+                
+    
+    def animate(self, frame, im):
+        self.sweep()
+        im.set_array(self.lattice)
+        return im,
+         
+    def run(self, nsteps, frequency):
+        norm = plt.Normalize(vmin=-1, vmax=1)
+        fig, ax = plt.subplots()
+        im = ax.imshow(self.lattice,norm=norm)
+
+        self.anim = animation.FuncAnimation(fig, self.animate, fargs = (im,), frames = nsteps, interval=frequency)
+        plt.show()
+
+
+if __name__ == "__main__":
+    
+    # Read input arguments
+    args = sys.argv
+    
+    if (len(args) != 6):
+        print("animation.py size temperature dynamics[Glauber/Kawasaki/Checkerboard/Wolff/SwendsenWang] nsteps frequency")
+        sys.exit(1)
+        
+    size = int(args[1])
+    temperature = float(args[2])
+    dynamics = str(args[3])
+    nsteps = int(args[4])
+    frequency = int(args[5])
+
+    
+    r = random.random()
+    if dynamics == 'Kawasaki':
+        if r < 0.25: lattice = np.concatenate((np.full((size, int(size/2)), 1), np.full((size, int(size/2)), -1)), axis=1)
+        elif r < 0.5: lattice = np.concatenate((np.full((size, int(size/2)), -1), np.full((size, int(size/2)), 1)), axis=1)
+        elif r < 0.75: lattice = np.concatenate((np.full((int(size/2), size), 1), np.full((int(size/2), size), -1)), axis=0)
+        else: lattice = np.concatenate((np.full((int(size/2), size), -1), np.full((int(size/2), size), 1)), axis=0)
+    else:
+        if r < 0.5: s = 1
+        else: s = -1
+        lattice = (np.full((size, size), s))
+    
+    model = IsingModel(size, temperature, dynamics, lattice)
+    model.run(nsteps, frequency)
+
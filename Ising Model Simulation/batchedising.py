@@ -0,0 +1,99 @@
+import numpy as np
+import time
+import sys
+
+from datawitherrors import write_data
+
+#many independent replicas of the ising model held as one (R, size, size) array and swept together with
+#checkerboard metropolis updates (the same equilibrium as glauber dynamics), so the interpreter overhead of a
+#sweep is shared by every replica
+
+class BatchedIsingModel(object):
+    def __init__(self, size, temperatures, replicas=1, seed=None):
+        if size % 2 != 0:
+            raise ValueError("BatchedIsingModel needs an even lattice size, got " + str(size))
+        self.size = size
+        self.temperatures = np.repeat(np.asarray(temperatures, dtype=float), replicas) #temperature of each replica
+        self.replicas = replicas
+        self.rng = np.random.default_rng(seed)
+
+        #each replica starts all up or all down, int8 spins keep the arrays small
+        signs = self.rng.choice(np.array([-1, 1], dtype=np.int8), size=len(self.temperatures))
+        self.lattices = np.ones((len(self.temperatures), size, size), dtype=np.int8) * signs[:, np.newaxis, np.newaxis]
+
+        parity = np.add.outer(np.arange(size), np.arange(size)) % 2
+        self.sublattices = [parity == 0, parity == 1] #red sites (i+j even) and black sites (i+j odd)
+        #metropolis acceptance for each replica, indexed by delta_E + 8
+        self.acceptance = np.minimum(1, np.exp(-np.arange(-8, 9)[np.newaxis, :] / self.temperatures[:, np.newaxis]))
+        self.replica_index = np.arange(len(self.temperatures))[:, np.newaxis, np.newaxis]
+
+        #running totals for every replica
+        self.energies = self.total_energies()
+        self.magnetizations = np.sum(self.lattices, axis=(1, 2), dtype=np.int64)
+
+    def total_energies(self): #each nearest neighbour pair counted once
+        return -np.sum(self.lattices * (np.roll(self.lattices, 1, axis=1) + np.roll(self.lattices, 1, axis=2)), axis=(1, 2), dtype=np.int64)
+
+    def checkerboard_update(self, sublattice):
+        neighbour_sum = (np.roll(self.lattices, 1, axis=1) + np.roll(self.lattices, -1, axis=1)
+                         + np.roll(self.lattices, 1, axis=2) + np.roll(self.lattices, -1, axis=2))
+        delta_E = 2 * self.lattices * neighbour_sum
+
+        flip = sublattice & (self.rng.random(self.lattices.shape) < self.acceptance[self.replica_index, delta_E + 8])
+        self.lattices[flip] *= -1
+        self.energies += np.sum(delta_E * flip, axis=(1, 2), dtype=np.int64)
+        self.magnetizations += 2 * np.sum(self.lattices * flip, axis=(1, 2), dtype=np.int64)
+
+    def sweep(self): #one sweep of every replica
+        for sublattice in self.sublattices:
+            self.checkerboard_update(sublattice)
+
+    def run(self, nsweeps, nequilibrate=100, stride=10):
+        #returns the magnetization and energy time series of every replica, shape (number of measurements, R)
+        magnetizations = []
+        energies = []
+        for n in range(nsweeps):
+            self.sweep()
+            if n > nequilibrate and n % stride == 0:
+                magnetizations.append(self.magnetizations.copy())
+                energies.append(self.energies.copy())
+        return np.array(magnetizations), np.array(energies)
+
+    def observables(self, magnetizations, energies):
+        #<|M|>, susceptibility, <E> and heat capacity for each replica, then the mean over the replicas at each
+        #temperature with the spread between independent replicas as the error
+        N = self.size ** 2
+        per_replica = np.array([np.mean(np.abs(magnetizations), axis=0),
+                                (np.mean(magnetizations ** 2, axis=0) - np.mean(magnetizations, axis=0) ** 2) / (N * self.temperatures),
+                                np.mean(energies, axis=0),
+                                (np.mean(energies ** 2, axis=0) - np.mean(energies, axis=0) ** 2) / (N * self.temperatures ** 2)])
+        per_replica = per_replica.reshape(4, -1, self.replicas) #(observable, temperature, replica)
+        means = np.mean(per_replica, axis=2)
+        errors = np.std(per_replica, axis=2, ddof=1) / np.sqrt(self.replicas) if self.replicas > 1 else np.zeros_like(means)
+        return means, errors
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 3:
+        print("batchedising.py [replicas] [nsweeps]")
+        sys.exit(1)
+
+    replicas = int(args[1]) if len(args) > 1 else 16 #independent replicas per temperature
+    nsweeps = int(args[2]) if len(args) > 2 else 10000
+
+    size = 50
+    temperatures = np.arange(1.0, 3.1, 0.1)
+
+    time1 = time.time()
+    model = BatchedIsingModel(size, temperatures, replicas)
+    magnetizations, energies = model.run(nsweeps)
+    time2 = time.time()
+    print(f"{len(temperatures) * replicas} lattices, {nsweeps} sweeps each, time: {time2 - time1:.1f} s")
+
+    means, errors = model.observables(magnetizations, energies)
+    write_data("GlauberBatched.txt", temperatures, means[0], means[1], means[2], means[3], errors[3], errors[1],
+               {'Magnetization_Error': errors[0], 'Energy_Error': errors[2]})
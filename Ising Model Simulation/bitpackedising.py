@@ -0,0 +1,183 @@
+import numpy as np
+import time
+import sys
+
+from datawitherrors import write_data
+import errorestimates
+
+#ising model with one bit per spin (1 = up, 0 = down), packed 64 spins to a uint64 word and updated with
+#multi-spin-coded checkerboard metropolis sweeps (the same equilibrium as glauber dynamics), so every bitwise
+#operation updates 64 spins. the red (i+j even) and black (i+j odd) sites of each row are packed into separate
+#arrays of shape (size, size/128), so all four neighbours of a red site are black and vice versa:
+#  red site (i, 2m + i%2) has black neighbours m in rows i-1 and i+1, and m and m-1 (even rows) or m+1 (odd rows) in row i
+#  black site (i, 2m + 1 - i%2) has red neighbours m in rows i-1 and i+1, and m and m+1 (even rows) or m-1 (odd rows) in row i
+
+RANDOM_BITS = 24 #bits of each uniform random number, so acceptance probabilities are exact to 6e-8
+BLOCK_WORDS = 4096 #words of one colour in a block of rows
+
+def pack(lattice): #+-1 lattice to (red, black) packed arrays
+    size = len(lattice)
+    rows = np.arange(size)[:, np.newaxis]
+    columns = 2 * np.arange(size // 2)[np.newaxis, :]
+    red = lattice[rows, columns + rows % 2] == 1
+    black = lattice[rows, columns + 1 - rows % 2] == 1
+    return np.packbits(red, axis=1, bitorder='little').view(np.uint64), np.packbits(black, axis=1, bitorder='little').view(np.uint64)
+
+def unpack(red, black): #(red, black) packed arrays to a +-1 lattice
+    size = len(red)
+    rows = np.arange(size)[:, np.newaxis]
+    columns = 2 * np.arange(size // 2)[np.newaxis, :]
+    lattice = np.empty((size, size), dtype=int)
+    lattice[rows, columns + rows % 2] = 2 * np.unpackbits(red.view(np.uint8), axis=1, bitorder='little').astype(int) - 1
+    lattice[rows, columns + 1 - rows % 2] = 2 * np.unpackbits(black.view(np.uint8), axis=1, bitorder='little').astype(int) - 1
+    return lattice
+
+def from_previous(words): #bit m of the result is bit m-1 of the row, wrapping around the periodic boundary
+    return (words << np.uint64(1)) | (np.roll(words, 1, axis=1) >> np.uint64(63))
+
+def from_next(words): #bit m of the result is bit m+1 of the row
+    return (words >> np.uint64(1)) | (np.roll(words, -1, axis=1) << np.uint64(63))
+
+def bit_threshold(probability): #probability as a RANDOM_BITS-bit integer, most significant bit first
+    threshold = int(probability * 2 ** RANDOM_BITS)
+    return [(threshold >> (RANDOM_BITS - 1 - bit)) & 1 for bit in range(RANDOM_BITS)]
+
+class BitPackedIsingModel(object):
+    def __init__(self, size, temperature, lattice=None, seed=None):
+        if size % 128 != 0:
+            raise ValueError("BitPackedIsingModel needs a lattice size that is a multiple of 128, got " + str(size))
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        if lattice is None: #all up
+            lattice = np.ones((size, size), dtype=int)
+        self.red, self.black = pack(lattice)
+        self.set_temperature(temperature)
+
+        #all ones on the rows whose horizontal neighbours come from m-1, for red and for black sites
+        even_rows = np.where(np.arange(size) % 2 == 0, ~np.uint64(0), np.uint64(0))[:, np.newaxis]
+        self.previous_rows = [even_rows, ~even_rows]
+
+        #a half sweep is worked out a block of rows at a time, drawing the random numbers for that block only, so the
+        #temporaries stay a small fixed size instead of growing with the lattice
+        block = min(size, max(1, BLOCK_WORDS // (size // 128)))
+        self.blocks = [(start, min(start + block, size)) for start in range(0, size, block)]
+
+    def set_temperature(self, temperature):
+        self.temperature = temperature
+        #flipping a spin with c anti-aligned neighbours changes the energy by 8 - 4c, so only c = 1 and c = 0 can be rejected
+        self.threshold_4 = bit_threshold(np.exp(-4 / temperature))
+        self.threshold_8 = bit_threshold(np.exp(-8 / temperature))
+
+    def neighbours(self, colour, start, end): #the four neighbour words of the sites of one colour in rows start to end - 1
+        other = self.black if colour == 0 else self.red
+        rows = np.arange(start, end)
+        same = other[start:end]
+        previous_rows = self.previous_rows[colour][start:end]
+        horizontal = (from_previous(same) & previous_rows) | (from_next(same) & ~previous_rows)
+        return other.take(rows - 1, axis=0, mode='wrap'), other.take(rows + 1, axis=0, mode='wrap'), same, horizontal
+
+    def checkerboard_update(self, colour):
+        #the sites of one colour only depend on the other colour, so each block can be updated in place
+        for start, end in self.blocks:
+            self.update_rows(colour, start, end)
+
+    def update_rows(self, colour, start, end):
+        spins = (self.red if colour == 0 else self.black)[start:end]
+        a1, a2, a3, a4 = [spins ^ neighbour for neighbour in self.neighbours(colour, start, end)] #1 where the neighbour is anti-aligned
+
+        #count the anti-aligned neighbours of 64 sites at once with a full adder: a1 + a2 + a3 = 2 * carry + total
+        total = a1 ^ a2 ^ a3
+        carry = (a1 & a2) | (a3 & (a1 ^ a2))
+        at_least_two = carry | (total & a4)
+        exactly_one = ~carry & (total ^ a4)
+        none = ~(a1 | a2 | a3 | a4)
+
+        #compare a bit-sliced uniform random number for each site with exp(-4/T) and exp(-8/T), most significant bit first
+        random_words = self.rng.bit_generator.random_raw((RANDOM_BITS,) + spins.shape)
+        below_4, below_8 = np.zeros_like(spins), np.zeros_like(spins)
+        equal_4, equal_8 = ~np.zeros_like(spins), ~np.zeros_like(spins)
+        for bit in range(RANDOM_BITS):
+            r = random_words[bit]
+            if self.threshold_4[bit]:
+                below_4 |= equal_4 & ~r
+                equal_4 &= r
+            else:
+                equal_4 &= ~r
+            if self.threshold_8[bit]:
+                below_8 |= equal_8 & ~r
+                equal_8 &= r
+            else:
+                equal_8 &= ~r
+
+        spins ^= at_least_two | (exactly_one & below_4) | (none & below_8)
+
+    def sweep(self):
+        self.checkerboard_update(0)
+        self.checkerboard_update(1)
+
+    def magnetization(self): #number of up spins by popcount, M = up - down
+        up = np.sum(np.bitwise_count(self.red), dtype=np.int64) + np.sum(np.bitwise_count(self.black), dtype=np.int64)
+        return 2 * up - self.size ** 2
+
+    def energy(self): #every bond joins a red site to a black one, so E = -(number of bonds) + 2 * (anti-aligned bonds)
+        anti_aligned = sum(np.sum(np.bitwise_count(self.red[start:end] ^ neighbour), dtype=np.int64)
+                           for start, end in self.blocks for neighbour in self.neighbours(0, start, end))
+        return -2 * self.size ** 2 + 2 * anti_aligned
+
+    def lattice(self):
+        return unpack(self.red, self.black)
+
+    def run(self, nsweeps, nequilibrate=100, stride=10):
+        #returns the magnetization and energy time series
+        magnetizations = []
+        energies = []
+        for n in range(nsweeps):
+            self.sweep()
+            if n > nequilibrate and n % stride == 0:
+                magnetizations.append(self.magnetization())
+                energies.append(self.energy())
+        return np.array(magnetizations), np.array(energies)
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 3:
+        print("bitpackedising.py [size] [nsweeps]")
+        sys.exit(1)
+
+    size = int(args[1]) if len(args) > 1 else 1024 #multiple of 128
+    nsweeps = int(args[2]) if len(args) > 2 else 2000
+    temperatures = np.arange(1.0, 3.1, 0.1)
+    k = 1000 #for bootstrap error
+
+    print(f"{size} x {size} lattice: {size ** 2 / 8 / 2 ** 20:.3g} MB packed, {size ** 2 * 8 / 2 ** 20:.3g} MB as int64")
+
+    magnetization_values = []
+    susceptibility_values = []
+    energy_values = []
+    heat_capacity_values = []
+    heatcapacity_error_values = []
+    susceptibility_error_values = []
+
+    model = BitPackedIsingModel(size, temperatures[0])
+    time1 = time.time()
+    for temperature in temperatures:
+        model.set_temperature(temperature) #each temperature starts from the lattice of the last one
+        magnetizations, energies = model.run(nsweeps)
+        magnetizations = np.abs(magnetizations) #a large lattice near T_c can drift between the two ordered states
+        magnetization_values.append(np.mean(magnetizations))
+        energy_values.append(np.mean(energies))
+        susceptibility = errorestimates.susceptibility_estimator(size, temperature)
+        heat_capacity = errorestimates.heat_capacity_estimator(size, temperature)
+        susceptibility_values.append(susceptibility(magnetizations.astype(float)))
+        heat_capacity_values.append(heat_capacity(energies.astype(float)))
+        susceptibility_error_values.append(errorestimates.bootstrap_error(magnetizations, susceptibility, k, model.rng))
+        heatcapacity_error_values.append(errorestimates.bootstrap_error(energies, heat_capacity, k, model.rng))
+    time2 = time.time()
+    print(f"{len(temperatures) * nsweeps} sweeps, time: {time2 - time1:.1f} s, {len(temperatures) * nsweeps * size ** 2 / (time2 - time1):.3g} spin updates per second")
+
+    write_data("GlauberBitPacked" + str(size) + ".txt", temperatures, magnetization_values, susceptibility_values, energy_values,
+               heat_capacity_values, heatcapacity_error_values, susceptibility_error_values)
@@ -0,0 +1,49 @@
+import numpy as np
+import time
+import sys
+
+from datawitherrors import IsingModel, initial_lattice
+from errorestimates import integrated_autocorrelation_time
+
+#compares how many effectively independent samples of |M| and E each dynamics produces per CPU-second at T_c,
+#where single-spin updates suffer from critical slowing down and cluster updates do not
+
+def benchmark(size, temperature, dynamics, backend, nsweeps, nequilibrate):
+    model = IsingModel(size, temperature, dynamics, initial_lattice(size, dynamics), backend=backend)
+    for n in range(nequilibrate):
+        model.sweep()
+
+    abs_magnetizations = []
+    energies = []
+    time1 = time.process_time()
+    for n in range(nsweeps):
+        model.sweep()
+        abs_magnetizations.append(np.abs(model.current_magnetization))
+        energies.append(model.current_energy)
+    cpu_time = time.process_time() - time1
+
+    tau_M = integrated_autocorrelation_time(abs_magnetizations)
+    tau_E = integrated_autocorrelation_time(energies)
+    effective_samples = nsweeps / (2 * max(tau_M, tau_E)) #limited by the slower of the two observables
+    return tau_M, tau_E, effective_samples / cpu_time
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 3:
+        print("clusterbenchmark.py [size] [nsweeps]")
+        sys.exit(1)
+
+    size = int(args[1]) if len(args) > 1 else 32
+    nsweeps = int(args[2]) if len(args) > 2 else 2000
+    nequilibrate = 200
+    temperature = 2 / np.log(1 + np.sqrt(2)) #exact T_c of the infinite lattice, about 2.269
+
+    print(f"L = {size}, T = {temperature:.4f}, {nsweeps} sweeps")
+    print("dynamics\tbackend\ttau_int(|M|)\ttau_int(E)\tindependent samples per CPU-second")
+    for dynamics, backend in [('Glauber', 'python'), ('Glauber', 'numba'), ('Checkerboard', 'python'), ('Wolff', 'python'), ('SwendsenWang', 'python')]:
+        tau_M, tau_E, samples_per_second = benchmark(size, temperature, dynamics, backend, nsweeps, nequilibrate)
+        print(f"{dynamics}\t{backend}\t{tau_M:.2f}\t{tau_E:.2f}\t{samples_per_second:.1f}")
@@ -1,190 +1,553 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Feb  2 17:21:59 2024
-
-@author: eccwi
-"""
-
-import numpy as np
-import random
-
-class IsingModel(object):
-    def __init__(self, size, temperature, dynamics, lattice):
-        self.size = size
-        self.temperature = temperature
-        self.dynamics = dynamics
-        self.lattice = lattice
-
-    def glauber_update(self):
-        #pick random site (i,j)
-        i = random.randint(0, self.size - 1)
-        j = random.randint(0, self.size - 1)
-        
-        delta_E = self.delta_E(i,j) #find change in energy
-        
-        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #glauber conditions for updating lattice
-            self.lattice[i, j] *= -1 #flip the sign of the randomly chosen site
-    
-    def kawasaki_update(self):
-        #pick random sites (i1. j1) and (i2. j2)
-        i1 = random.randint(0, self.size - 1)
-        j1 = random.randint(0, self.size - 1)
-        i2 = random.randint(0, self.size - 1)
-        j2 = random.randint(0, self.size - 1)
-        
-        while self.lattice[i1, j1] == self.lattice[i2, j2]: #if the two sites have the same sign, repick until they are different
-            i1 = random.randint(0, self.size - 1)
-            j1 = random.randint(0, self.size - 1)
-            i2 = random.randint(0, self.size - 1)
-            j2 = random.randint(0, self.size - 1)
-        
-        #if the two sites are nearest neighbours, include a nearest neighbour correction to avoid over counting in energy change
-        if [i1, j1] in [[(i2+1)%self.size, j2], [(i2-1)%self.size, j2], [i2, (j2+1)%self.size], [i2, (j2-1)%self.size]]:
-           nearest_neighbour_correction = 2 * self.lattice[i1, j1] * self.lattice[i2, j2]
-        else:
-            nearest_neighbour_correction = 0
-        
-        delta_E = self.delta_E(i1,j1) + self.delta_E(i2,j2) - nearest_neighbour_correction #find change in energy 
-        
-        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #kawasaki conditions for updating lattice
-            self.lattice[i1, j1], self.lattice[i2, j2] = self.lattice[i2, j2], self.lattice[i1, j1] #switch the signs of the two sites
-    
-    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
-        return [self.lattice[(i+1)%self.size, j],
-                self.lattice[(i-1)%self.size, j],
-                self.lattice[i, (j+1)%self.size],
-                self.lattice[i, (j-1)%self.size]]
-    
-    def delta_E(self, i, j): #finds change in energy if the sign of a site is flipped
-        return 2 * self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
-    
-    def magnetization(self):
-        return np.sum(self.lattice) #magnetization is the sum of all signs in the lattice
-     
-    def total_energy(self): #total energy is sum over all multiplied values of nearest neighbour pairs
-        total_energy = 0
-        for i in range(self.size):
-            for j in range(self.size):
-                total_energy -= self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
-        return total_energy / 2 #divide by two since we are overcounting each pair twice
-    
-    def susceptibility(self, magnetizations, magnetizationssquared):
-        return (1/((self.size ** 2) * self.temperature)) * (np.mean(magnetizationssquared) - np.mean(magnetizations) ** 2)
-    
-    def heat_capacity(self, energies, energiessquared):
-        return (1/((self.size ** 2) * (self.temperature ** 2))) * (np.mean(energiessquared) - np.mean(energies) ** 2)  
-    
-    def sweep(self):  #one sweep is n updates, where n is the number of sites in the lattice
-        for n in range(self.size ** 2):
-            if self.dynamics == 'Glauber':
-                self.glauber_update()
-            elif self.dynamics == 'Kawasaki':
-                self.kawasaki_update()
-                
-    def bootstrap_error(self, variables, formula, k):
-        #lists to store observables
-        bootstrap_observables = []
-        bootstrap_observablessquared = []
-
-        number_of_measurements = len(variables)
-        
-        for i in range(k): #repeat resampling and observable calculating k times
-            resampled_variables = []
-            resampled_variablessquared = []
-            
-            for i in range(number_of_measurements):
-                n = random.randint(0, number_of_measurements - 1) #select a random index 
-                resampled_variables.append(variables[n]) #use index to randomly pick (resample) from list of variables and store it
-                resampled_variablessquared.append(variables[n] ** 2)
-            
-            #calculate the observable based on list of resampled variables
-            if formula == 'susceptibility':
-                bootstrap_observable = self.susceptibility(resampled_variables, resampled_variablessquared)
-            elif formula == 'heat capacity':
-                bootstrap_observable = self.heat_capacity(resampled_variables, resampled_variablessquared)
-            
-            #store the observable
-            bootstrap_observables.append(bootstrap_observable)
-            bootstrap_observablessquared.append(bootstrap_observable ** 2)
-    
-        #find error using the mean and mean squared of the different observables (bootstrap method)
-        error = np.sqrt(np.mean(bootstrap_observablessquared) - (np.mean(bootstrap_observables) ** 2))
-        return error
-        
-    def run(self, nsweeps, k):
-        #lists to store variables
-        magnetizations = []
-        abs_magnetizations = []
-        magnetizationssquared = []
-        energies = []
-        energiessquared = []
-        
-        for n in range(nsweeps):
-            self.sweep()
-            if n > 100 and n%10 == 0: #wait 100 sweeps for equilibration and store variables every 10 sweeps to avoid correlation between measurements 
-                #store appropriate variables
-                magnetizations.append(self.magnetization())
-                abs_magnetizations.append(np.abs(self.magnetization()))
-                magnetizationssquared.append(self.magnetization() ** 2)
-                energies.append(self.total_energy())
-                energiessquared.append(self.total_energy() ** 2)
-        
-        #calculate the relevant observables using the stored data 
-        average_M = np.mean(abs_magnetizations)
-        average_E = np.mean(energies)
-        susceptibility = self.susceptibility(magnetizations, magnetizationssquared)
-        heat_capacity = self.heat_capacity(energies, energiessquared)
-        
-        #find errors using bootstrap methods
-        susceptibility_error = self.bootstrap_error(magnetizations, 'susceptibility', k)
-        heatcapacity_error = self.bootstrap_error(energies, 'heat capacity', k)
-        
-        return average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, self.lattice
-    
-if __name__ == "__main__":
-    
-    size = 50
-    temperatures = np.arange(1.0, 3.1, 0.1)
-    nsweeps = 10000 #number of sweeps for each temperature
-    k = 1000 #for bootstrap error
-    
-    dynamics_list = ['Glauber', 'Kawasaki']
-    
-    for dynamics in dynamics_list:
-    
-        magnetization_values = []
-        susceptibility_values = []
-        energy_values = []
-        heat_capacity_values = []
-        heatcapacity_error_values = []
-        susceptibility_error_values = []
-        
-        r = random.random()
-        if dynamics == 'Glauber':
-            if r < 0.5: s = 1
-            else: s = -1
-            lattice = np.full((size, size), s)
-        elif dynamics == 'Kawasaki':
-            if r < 0.25: lattice = np.concatenate((np.full((size, int(size/2)), 1), np.full((size, int(size/2)), -1)), axis=1)
-            elif r < 0.5: lattice = np.concatenate((np.full((size, int(size/2)), -1), np.full((size, int(size/2)), 1)), axis=1)
-            elif r < 0.75: lattice = np.concatenate((np.full((int(size/2), size), 1), np.full((int(size/2), size), -1)), axis=0)
-            else: lattice = np.concatenate((np.full((int(size/2), size), -1), np.full((int(size/2), size), 1)), axis=0)
-    
-        for temperature in temperatures:
-            model = IsingModel(size, temperature, dynamics, lattice)
-            average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, lattice = model.run(nsweeps, k)  
-            magnetization_values.append(average_M)
-            susceptibility_values.append(susceptibility)
-            energy_values.append(average_E)
-            heat_capacity_values.append(heat_capacity)
-            heatcapacity_error_values.append(heatcapacity_error)
-            susceptibility_error_values.append(susceptibility_error)
-            
-        name = dynamics + ".txt"
-        
-        f = open(name, 'w')
-            
-        with open(name, 'w') as file:
-            file.write("Temperature\tMagnetization\tSusceptibility\tEnergy\tHeat_Capacity\tHeat_Capacity_Error\tSusceptibility_Error\n")    
-            for i in range(len(temperatures)): # Write data for each temperature
-                file.write(f"{temperatures[i]}\t{magnetization_values[i]}\t{susceptibility_values[i]}\t{energy_values[i]}\t{heat_capacity_values[i]}\t{heatcapacity_error_values[i]}\t{susceptibility_error_values[i]}\n")
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Feb  2 17:21:59 2024
+
+@author: eccwi
+"""
+
+import numpy as np
+import random
+import os
+import sys
+import time
+import json
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Shared Modules'))
+import backends
+import errorestimates
+import instrumentation
+
+class IsingModel(object):
+    def __init__(self, size, temperature, dynamics, lattice, debug=False, backend='python', seed=None, stats=None):
+        self.size = size
+        self.temperature = temperature
+        self.dynamics = dynamics
+        self.lattice = np.ascontiguousarray(lattice) #the numpy and numba kernels update the lattice through a flat view
+        self.backend = backends.get_backend(backend) #'python', 'numpy' or 'numba' kernels for glauber and kawasaki sweeps
+        self.rng = np.random.default_rng(seed) #random numbers for the numpy and numba kernels
+        self.debug = debug #if True, check the running totals against a full recalculation at every measurement
+        self.stats = stats #optional instrumentation.RunStats, collecting phase times and acceptance counts
+        self.neighbour_table = backends.neighbour_table(size) #flat indices of the four nearest neighbours of every site
+        
+        #running totals of energy and magnetization, updated whenever an update is accepted
+        self.current_energy = self.total_energy()
+        self.current_magnetization = self.magnetization()
+        
+        #progress of run(), kept on the model so that a run can be checkpointed and resumed part way through
+        self.sweeps_done = 0
+        self.measured_magnetizations = [] #signed M, whichever of run and run_adaptive made them
+        self.measured_energies = []
+        self.measurement_stride = 10 #sweeps between the stored measurements, run_adaptive sets its own
+        
+        if dynamics == 'Kawasaki':
+            self.build_spin_index()
+        
+        if dynamics == 'Checkerboard':
+            #red/black sublattices only stay independent across the periodic boundary if the size is even
+            if size % 2 != 0:
+                raise ValueError("Checkerboard dynamics needs an even lattice size, got " + str(size))
+            parity = np.add.outer(np.arange(size), np.arange(size)) % 2
+            self.sublattices = [parity == 0, parity == 1] #red sites (i+j even) and black sites (i+j odd)
+            self.acceptance = np.minimum(1, np.exp(-np.arange(-8, 9) / temperature)) #metropolis acceptance indexed by delta_E + 8
+    
+    def set_temperature(self, temperature): #change temperature in place, e.g. when replicas swap temperatures
+        self.temperature = temperature
+        if self.dynamics == 'Checkerboard':
+            self.acceptance = np.minimum(1, np.exp(-np.arange(-8, 9) / temperature))
+
+    def glauber_update(self):
+        #pick random site (i,j)
+        i = random.randint(0, self.size - 1)
+        j = random.randint(0, self.size - 1)
+        
+        delta_E = self.delta_E(i,j) #find change in energy
+        
+        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #glauber conditions for updating lattice
+            self.lattice[i, j] *= -1 #flip the sign of the randomly chosen site
+            self.current_energy += delta_E
+            self.current_magnetization += 2 * self.lattice[i, j]
+            return True #accepted, for the run statistics
+    
+    def build_spin_index(self): #index of the up and down sites so that kawasaki pairs can be picked in constant time
+        flat_lattice = self.lattice.ravel()
+        self.up_sites = np.flatnonzero(flat_lattice == 1) #flat index i*size + j of every up site
+        self.down_sites = np.flatnonzero(flat_lattice == -1)
+        self.site_position = np.empty(self.size ** 2, dtype=int) #where each site is stored in up_sites or down_sites
+        self.site_position[self.up_sites] = np.arange(len(self.up_sites))
+        self.site_position[self.down_sites] = np.arange(len(self.down_sites))
+        
+        self.neighbour_lists = self.neighbour_table.tolist()
+        self.neighbour_sets = [set(neighbours) for neighbours in self.neighbour_lists]
+    
+    def neighbour_sum(self, site): #sum of the nearest neighbour signs of a site, using the flat neighbour table
+        flat_lattice = self.lattice.ravel()
+        n1, n2, n3, n4 = self.neighbour_lists[site]
+        return flat_lattice[n1] + flat_lattice[n2] + flat_lattice[n3] + flat_lattice[n4]
+    
+    def kawasaki_update(self):
+        if len(self.up_sites) == 0 or len(self.down_sites) == 0: #every spin has the same sign so there is nothing to swap
+            return
+        
+        #pick a random up site and a random down site, so every pair of opposite spins is as likely as when redrawing until the signs differ
+        site1 = self.up_sites[random.randrange(len(self.up_sites))]
+        site2 = self.down_sites[random.randrange(len(self.down_sites))]
+        i1, j1 = divmod(site1, self.size)
+        i2, j2 = divmod(site2, self.size)
+        
+        #if the two sites are nearest neighbours, include a nearest neighbour correction to avoid over counting in energy change
+        if site1 in self.neighbour_sets[site2]:
+           nearest_neighbour_correction = 4 * self.lattice[i1, j1] * self.lattice[i2, j2] #the bond between the two sites is counted once in each delta_E but does not change
+        else:
+            nearest_neighbour_correction = 0
+        
+        #find change in energy, site1 is up and site2 is down so flipping each changes the energy by +2 and -2 times its neighbour sum
+        delta_E = 2 * self.neighbour_sum(site1) - 2 * self.neighbour_sum(site2) - nearest_neighbour_correction
+        
+        if delta_E <= 0 or random.random() < np.exp(-delta_E / self.temperature): #kawasaki conditions for updating lattice
+            self.lattice[i1, j1], self.lattice[i2, j2] = self.lattice[i2, j2], self.lattice[i1, j1] #switch the signs of the two sites
+            self.current_energy += delta_E #magnetization is unchanged by a swap
+            
+            #site1 is now down and site2 is now up, so they trade places in the spin index
+            position1, position2 = self.site_position[site1], self.site_position[site2]
+            self.up_sites[position1] = site2
+            self.down_sites[position2] = site1
+            self.site_position[site1], self.site_position[site2] = position2, position1
+            return True
+    
+    def checkerboard_update(self, sublattice):
+        #sum of the four nearest neighbours for every site at once
+        neighbour_sum = (np.roll(self.lattice, 1, axis=0) + np.roll(self.lattice, -1, axis=0)
+                         + np.roll(self.lattice, 1, axis=1) + np.roll(self.lattice, -1, axis=1))
+        delta_E = 2 * self.lattice * neighbour_sum
+        
+        #no two sites of a sublattice are neighbours, so all of them can be updated at once with the glauber conditions
+        flip = sublattice & (np.random.random(self.lattice.shape) < self.acceptance[delta_E + 8])
+        self.lattice[flip] *= -1
+        self.current_energy += np.sum(delta_E[flip])
+        flipped = self.lattice[flip]
+        self.current_magnetization += 2 * np.sum(flipped)
+        return len(flipped) #number of accepted flips
+    
+    def wolff_update(self): #grows one wolff cluster from a random site and flips it, returns the size of the cluster
+        p_add = 1 - np.exp(-2 / self.temperature) #probability of adding an aligned neighbour to the cluster
+        flat_lattice = self.lattice.reshape(-1)
+        seed = np.random.randint(self.size ** 2)
+        spin = flat_lattice[seed]
+        in_cluster = np.zeros(self.size ** 2, dtype=bool)
+        in_cluster[seed] = True
+        
+        #grow the cluster one layer at a time from an array of the newest sites, so every bond out of the cluster is tried once
+        frontier = np.array([seed])
+        while len(frontier) > 0:
+            candidates = self.neighbour_table[frontier].ravel()
+            added = candidates[(flat_lattice[candidates] == spin) & ~in_cluster[candidates] & (np.random.random(len(candidates)) < p_add)]
+            frontier = np.unique(added)
+            in_cluster[frontier] = True
+        
+        flat_lattice[in_cluster] = -spin
+        return np.count_nonzero(in_cluster)
+    
+    def wolff_sweep(self): #flip clusters until about as many spins as there are sites have been flipped
+        flipped = 0
+        while flipped < self.size ** 2:
+            flipped += self.wolff_update()
+    
+    def swendsen_wang_update(self): #splits the whole lattice into clusters and flips each one with probability 1/2
+        p_add = 1 - np.exp(-2 / self.temperature)
+        flat_lattice = self.lattice.reshape(-1)
+        sites = np.arange(self.size ** 2)
+        
+        #bond masks to the neighbours at (i+1,j) and (i,j+1), active between aligned spins with probability p_add
+        bond_sites = []
+        bond_neighbours = []
+        for direction in [0, 2]:
+            neighbours = self.neighbour_table[:, direction]
+            active = (flat_lattice == flat_lattice[neighbours]) & (np.random.random(self.size ** 2) < p_add)
+            bond_sites.append(sites[active])
+            bond_neighbours.append(neighbours[active])
+        bond_sites = np.concatenate(bond_sites)
+        bond_neighbours = np.concatenate(bond_neighbours)
+        
+        #clusters are the connected components of the active bonds
+        bonds = coo_matrix((np.ones(len(bond_sites)), (bond_sites, bond_neighbours)), shape=(self.size ** 2, self.size ** 2))
+        number_of_clusters, labels = connected_components(bonds, directed=False)
+        flip = np.random.random(number_of_clusters) < 0.5
+        flat_lattice[flip[labels]] *= -1
+    
+    def nearest_neighbours(self, i, j): #gives the sign values of the nearest neighbours of (i,j)
+        return [self.lattice[(i+1)%self.size, j],
+                self.lattice[(i-1)%self.size, j],
+                self.lattice[i, (j+1)%self.size],
+                self.lattice[i, (j-1)%self.size]]
+    
+    def delta_E(self, i, j): #finds change in energy if the sign of a site is flipped
+        return 2 * self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
+    
+    def magnetization(self):
+        return np.sum(self.lattice) #magnetization is the sum of all signs in the lattice
+     
+    def total_energy(self): #total energy is sum over all multiplied values of nearest neighbour pairs
+        total_energy = 0
+        for i in range(self.size):
+            for j in range(self.size):
+                total_energy -= self.lattice[i, j] * np.sum(self.nearest_neighbours(i, j))
+        return total_energy / 2 #divide by two since we are overcounting each pair twice
+    
+    def vectorized_energy(self): #same as total_energy, counting each pair once with whole-lattice shifts
+        return -np.sum(self.lattice * (np.roll(self.lattice, 1, axis=0) + np.roll(self.lattice, 1, axis=1)))
+    
+    def check_totals(self): #compare the running totals with a full recalculation (debug mode)
+        if self.current_energy != self.total_energy() or self.current_magnetization != self.magnetization():
+            raise RuntimeError("running totals E = " + str(self.current_energy) + ", M = " + str(self.current_magnetization)
+                               + " do not match recalculated E = " + str(self.total_energy()) + ", M = " + str(self.magnetization()))
+        if self.dynamics == 'Kawasaki':
+            if set(self.up_sites) != set(np.flatnonzero(self.lattice.ravel() == 1)) or set(self.down_sites) != set(np.flatnonzero(self.lattice.ravel() == -1)):
+                raise RuntimeError("kawasaki spin index does not match the lattice")
+    
+    def susceptibility(self, magnetizations, magnetizationssquared):
+        return (1/((self.size ** 2) * self.temperature)) * (np.mean(magnetizationssquared) - np.mean(magnetizations) ** 2)
+    
+    def heat_capacity(self, energies, energiessquared):
+        return (1/((self.size ** 2) * (self.temperature ** 2))) * (np.mean(energiessquared) - np.mean(energies) ** 2)  
+    
+    def sweep(self):  #one sweep is n updates, where n is the number of sites in the lattice
+        attempted = self.size ** 2
+        if self.dynamics == 'Checkerboard': #update every red site then every black site, n updates in total
+            accepted = 0
+            for sublattice in self.sublattices:
+                accepted += self.checkerboard_update(sublattice)
+        elif self.dynamics == 'Wolff' or self.dynamics == 'SwendsenWang': #cluster updates, the running totals are recalculated after the sweep
+            if self.dynamics == 'Wolff':
+                self.wolff_sweep()
+            else:
+                self.swendsen_wang_update()
+            self.current_energy = self.vectorized_energy()
+            self.current_magnetization = self.magnetization()
+            attempted = accepted = 0 #rejection free, so there is no acceptance ratio
+        else:
+            accepted = self.backend.ising_sweep(self)
+        if self.stats is not None:
+            self.stats.count_sweep(attempted, accepted)
+                
+    def bootstrap_error(self, variables, formula, k):
+        #k resamples of the measurements, drawn and evaluated as whole arrays by the shared error module
+        if formula == 'susceptibility':
+            estimator = errorestimates.susceptibility_estimator(self.size, self.temperature)
+        elif formula == 'heat capacity':
+            estimator = errorestimates.heat_capacity_estimator(self.size, self.temperature)
+        return errorestimates.bootstrap_error(variables, estimator, k, self.rng)
+        
+    def run(self, nsweeps, k, checkpoint=None):
+        if self.stats is not None:
+            self.stats.start(nsweeps - self.sweeps_done)
+        if checkpoint is not None:
+            save_time = checkpoint.save_time
+        
+        #carries on from sweeps_done, so a model restored with set_state finishes the run it was saved in
+        while self.sweeps_done < nsweeps:
+            n = self.sweeps_done
+            self.sweep()
+            if n > 100 and n%self.measurement_stride == 0: #wait 100 sweeps for equilibration and store variables every 10 sweeps to avoid correlation between measurements 
+                with instrumentation.timer(self.stats, 'measure'):
+                    if self.debug:
+                        self.check_totals()
+                    #store appropriate variables using the running totals, so measuring is O(1)
+                    self.measured_magnetizations.append(self.current_magnetization)
+                    self.measured_energies.append(self.current_energy)
+            self.sweeps_done += 1
+            if checkpoint is not None:
+                checkpoint.maybe_save(self)
+        if checkpoint is not None and self.stats is not None:
+            self.stats.add_time('checkpoint', checkpoint.save_time - save_time)
+        
+        #calculate the relevant observables using the stored data 
+        magnetizations = np.array(self.measured_magnetizations)
+        energies = np.array(self.measured_energies)
+        average_M = np.mean(np.abs(magnetizations))
+        average_E = np.mean(energies)
+        susceptibility = self.susceptibility(magnetizations, magnetizations ** 2)
+        heat_capacity = self.heat_capacity(energies, energies ** 2)
+        
+        #find errors using bootstrap methods
+        with instrumentation.timer(self.stats, 'bootstrap'):
+            susceptibility_error = self.bootstrap_error(magnetizations, 'susceptibility', k)
+            heatcapacity_error = self.bootstrap_error(energies, 'heat capacity', k)
+        if self.stats is not None:
+            self.stats.stop()
+        
+        return average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, self.lattice
+    
+    def get_state(self): #everything needed to carry on a run exactly where it stopped, as arrays for np.savez
+        state = {'lattice': self.lattice, 'sweeps_done': self.sweeps_done,
+                 'measured_magnetizations': np.array(self.measured_magnetizations),
+                 'measured_energies': np.array(self.measured_energies),
+                 'current_energy': self.current_energy, 'current_magnetization': self.current_magnetization,
+                 'rng_state': json.dumps(self.rng.bit_generator.state)}
+        if self.dynamics == 'Kawasaki': #the order of the spin index decides which pairs get picked
+            state['up_sites'] = self.up_sites
+            state['down_sites'] = self.down_sites
+        return state
+    
+    def set_state(self, state):
+        self.lattice = np.ascontiguousarray(state['lattice'])
+        self.sweeps_done = int(state['sweeps_done'])
+        self.measured_magnetizations = state['measured_magnetizations'].tolist()
+        self.measured_energies = state['measured_energies'].tolist()
+        self.current_energy = state['current_energy'].item()
+        self.current_magnetization = state['current_magnetization'].item()
+        self.rng.bit_generator.state = json.loads(str(state['rng_state']))
+        if self.dynamics == 'Kawasaki':
+            self.up_sites = state['up_sites'].copy()
+            self.down_sites = state['down_sites'].copy()
+            self.site_position[self.up_sites] = np.arange(len(self.up_sites))
+            self.site_position[self.down_sites] = np.arange(len(self.down_sites))
+    
+    def is_equilibrated(self, series, window):
+        #the means of the two halves of the latest 2*window sweeps agree within twice their combined (blocking) error
+        first_half = np.asarray(series[-2 * window:-window], dtype=float)
+        second_half = np.asarray(series[-window:], dtype=float)
+        error = np.sqrt(errorestimates.blocking_error(first_half, 8) ** 2 + errorestimates.blocking_error(second_half, 8) ** 2)
+        return np.abs(np.mean(first_half) - np.mean(second_half)) <= 2 * error
+    
+    def run_adaptive(self, target_samples, k, max_sweeps=100000, window=50):
+        if self.stats is not None: #the number of sweeps is not known in advance, so no estimated time left
+            self.stats.start()
+        
+        #time series of every sweep, measuring is O(1) thanks to the running totals
+        magnetizations = []
+        energies = []
+        
+        #equilibration: sweep until |M| and E are both stationary over the latest 2*window sweeps
+        while len(energies) < max_sweeps:
+            for n in range(window):
+                self.sweep()
+                magnetizations.append(self.current_magnetization)
+                energies.append(self.current_energy)
+            with instrumentation.timer(self.stats, 'equilibration check'):
+                equilibrated = len(energies) >= 2 * window and self.is_equilibrated(np.abs(magnetizations), window) and self.is_equilibrated(energies, window)
+            if equilibrated:
+                break
+        equilibration_sweeps = len(energies) - window #keep only the second half of the stationary window
+        magnetizations = magnetizations[equilibration_sweeps:]
+        energies = energies[equilibration_sweeps:]
+        
+        #production: estimate the integrated autocorrelation times as the series grows, and stop once there are
+        #target_samples effectively independent samples (n / 2 tau_int) of both |M| and E
+        while True:
+            with instrumentation.timer(self.stats, 'autocorrelation'):
+                if self.debug:
+                    self.check_totals()
+                tau_M = errorestimates.integrated_autocorrelation_time(np.abs(magnetizations))
+                tau_E = errorestimates.integrated_autocorrelation_time(energies)
+            tau = max(tau_M, tau_E)
+            if len(energies) / (2 * tau) >= target_samples or equilibration_sweeps + len(energies) >= max_sweeps:
+                break
+            #sweep until the length that the current estimate of tau_int says is needed, in steps of at least window sweeps
+            needed = int(1.1 * 2 * tau * target_samples)
+            for n in range(min(max(needed - len(energies), window), max_sweeps - equilibration_sweeps - len(energies))):
+                self.sweep()
+                magnetizations.append(self.current_magnetization)
+                energies.append(self.current_energy)
+        
+        #calculate the relevant observables using every sweep, with |M| in the susceptibility because the
+        #cluster dynamics (and long glauber runs near T_c) flip between the two ordered states
+        magnetizations = np.array(magnetizations)
+        absolute_magnetizations = np.abs(magnetizations)
+        energies = np.array(energies)
+        average_M = np.mean(absolute_magnetizations)
+        average_E = np.mean(energies)
+        susceptibility = self.susceptibility(absolute_magnetizations, absolute_magnetizations ** 2)
+        heat_capacity = self.heat_capacity(energies, energies ** 2)
+        
+        #measurements a stride of 2 tau_int apart are roughly independent, so the bootstrap errors use those
+        stride = max(1, int(np.ceil(2 * tau)))
+        with instrumentation.timer(self.stats, 'bootstrap'):
+            susceptibility_error = self.bootstrap_error(absolute_magnetizations[::stride], 'susceptibility', k)
+            heatcapacity_error = self.bootstrap_error(energies[::stride], 'heat capacity', k)
+        
+        #keep the roughly independent measurements on the model, signed like those of run(), for histogram reweighting
+        self.measured_magnetizations = magnetizations[::stride].tolist()
+        self.measured_energies = energies[::stride].tolist()
+        self.measurement_stride = stride
+        if self.stats is not None:
+            self.stats.stop()
+        
+        return {'magnetization': average_M, 'susceptibility': susceptibility, 'susceptibility_error': susceptibility_error,
+                'energy': average_E, 'heat_capacity': heat_capacity, 'heat_capacity_error': heatcapacity_error,
+                'tau_M': tau_M, 'tau_E': tau_E,
+                'effective_samples_M': len(magnetizations) / (2 * tau_M), 'effective_samples_E': len(energies) / (2 * tau_E),
+                'equilibration_sweeps': equilibration_sweeps, 'stride': stride, 'nsweeps': equilibration_sweeps + len(energies)}
+
+class Checkpoint(object):
+    #saves the progress of a temperature scan to a compressed .npz file, at most every interval seconds during a run
+    #and after each temperature, so a stopped scan can carry on with --resume. the file is written under a temporary
+    #name and then renamed, so stopping the scan while it saves never leaves a broken checkpoint
+    def __init__(self, filename, interval=300):
+        self.filename = filename
+        self.interval = interval
+        self.scan = {} #progress of the scan itself (finished results, current lattice and position), kept up to date by the driver
+        self.start_time = time.time()
+        self.last_save = self.start_time
+        self.save_time = 0 #total time spent saving, to keep an eye on the overhead
+    
+    def maybe_save(self, model):
+        if time.time() - self.last_save >= self.interval:
+            self.save(model)
+    
+    def save(self, model=None):
+        time1 = time.time()
+        arrays = {'scan_' + key: np.asarray(value) for key, value in self.scan.items()}
+        if model is not None: #part way through a temperature
+            arrays.update({'model_' + key: np.asarray(value) for key, value in model.get_state().items()})
+        #the global generators used by the python kernels, the cluster updates and initial_lattice
+        version, internal_state, gauss = random.getstate()
+        arrays['random_state'] = np.array(internal_state, dtype=np.uint32)
+        arrays['random_extra'] = json.dumps([version, gauss])
+        name, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+        arrays['numpy_random_state'] = keys
+        arrays['numpy_random_extra'] = json.dumps([name, position, has_gauss, cached_gaussian])
+        
+        with open(self.filename + '.tmp', 'wb') as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(self.filename + '.tmp', self.filename)
+        self.last_save = time.time()
+        self.save_time += self.last_save - time1
+    
+    def load(self): #restores the global generators and returns the scan progress and the model state (None between temperatures)
+        with np.load(self.filename) as data:
+            self.scan = {key[5:]: data[key] for key in data.files if key.startswith('scan_')}
+            model_state = {key[6:]: data[key] for key in data.files if key.startswith('model_')}
+            version, gauss = json.loads(str(data['random_extra']))
+            random.setstate((version, tuple(data['random_state'].tolist()), gauss))
+            name, position, has_gauss, cached_gaussian = json.loads(str(data['numpy_random_extra']))
+            np.random.set_state((name, data['numpy_random_state'], position, has_gauss, cached_gaussian))
+        return self.scan, (model_state if model_state else None)
+    
+    def overhead(self): #fraction of the run time spent saving checkpoints
+        return self.save_time / (time.time() - self.start_time)
+
+def initial_lattice(size, dynamics):
+    r = random.random()
+    if dynamics == 'Kawasaki': #half up and half down, split either vertically or horizontally
+        if r < 0.25: lattice = np.concatenate((np.full((size, int(size/2)), 1), np.full((size, int(size/2)), -1)), axis=1)
+        elif r < 0.5: lattice = np.concatenate((np.full((size, int(size/2)), -1), np.full((size, int(size/2)), 1)), axis=1)
+        elif r < 0.75: lattice = np.concatenate((np.full((int(size/2), size), 1), np.full((int(size/2), size), -1)), axis=0)
+        else: lattice = np.concatenate((np.full((int(size/2), size), -1), np.full((int(size/2), size), 1)), axis=0)
+    else: #all up or all down
+        if r < 0.5: s = 1
+        else: s = -1
+        lattice = np.full((size, size), s)
+    return lattice
+
+def write_data(name, temperatures, magnetization_values, susceptibility_values, energy_values, heat_capacity_values, heatcapacity_error_values, susceptibility_error_values, extra_columns=None):
+    #extra_columns maps a column name to its values, written after the standard columns
+    if extra_columns is None:
+        extra_columns = {}
+    with open(name, 'w') as file:
+        file.write("Temperature\tMagnetization\tSusceptibility\tEnergy\tHeat_Capacity\tHeat_Capacity_Error\tSusceptibility_Error" + "".join("\t" + column for column in extra_columns) + "\n")    
+        for i in range(len(temperatures)): # Write data for each temperature
+            file.write(f"{temperatures[i]}\t{magnetization_values[i]}\t{susceptibility_values[i]}\t{energy_values[i]}\t{heat_capacity_values[i]}\t{heatcapacity_error_values[i]}\t{susceptibility_error_values[i]}"
+                       + "".join(f"\t{values[i]}" for values in extra_columns.values()) + "\n")
+
+def write_timeseries(name, size, temperatures, magnetization_series, energy_series, strides):
+    #raw measurements of signed M and E at each temperature (runs can have different lengths), for reweighting.py,
+    #and the number of sweeps between the measurements at each temperature
+    series = {}
+    for i in range(len(temperatures)):
+        series['magnetizations_' + str(i)] = magnetization_series[i]
+        series['energies_' + str(i)] = energy_series[i]
+    np.savez_compressed(name, size=size, temperatures=temperatures, strides=strides, **series)
+    
+if __name__ == "__main__":
+    
+    # Read optional input arguments
+    args = sys.argv
+    
+    if len(args) > 4 or any(arg not in ('adaptive', '--resume', '--profile') for arg in args[1:]):
+        print("datawitherrors.py [adaptive] [--resume] [--profile]")
+        sys.exit(1)
+    
+    adaptive = 'adaptive' in args #equilibrate and sample each temperature according to its autocorrelation time
+    resume = '--resume' in args #carry on from the last checkpoint of a scan that was stopped
+    profile = '--profile' in args #print phase times and acceptance ratios for each temperature, and progress every 30 s
+    
+    size = 50
+    temperatures = np.arange(1.0, 3.1, 0.1)
+    nsweeps = 10000 #number of sweeps for each temperature
+    k = 1000 #for bootstrap error
+    target_samples = 1000 #effectively independent samples per temperature in adaptive mode
+    
+    dynamics_list = ['Glauber', 'Kawasaki'] #'Checkerboard', 'Wolff' and 'SwendsenWang' also work here
+    
+    result_columns = ['magnetization', 'susceptibility', 'energy', 'heat_capacity', 'heat_capacity_error', 'susceptibility_error']
+    adaptive_columns = {'tau_M': 'tau_M', 'tau_E': 'tau_E', 'Effective_Samples_M': 'effective_samples_M',
+                        'Effective_Samples_E': 'effective_samples_E', 'Sweeps': 'nsweeps'} #output column: run_adaptive key
+    
+    checkpoint = Checkpoint("datawitherrors_checkpoint.npz") #saved every 5 minutes and after each temperature
+    model_state = None
+    if resume:
+        if not os.path.exists(checkpoint.filename):
+            print("no checkpoint to resume from: " + checkpoint.filename)
+            sys.exit(1)
+        scan, model_state = checkpoint.load()
+        adaptive = bool(scan['adaptive']) #a scan always carries on in the mode it was started in
+    else:
+        scan = {'adaptive': adaptive, 'dynamics_index': 0, 'temperature_index': 0}
+    
+    for d in range(int(scan['dynamics_index']), len(dynamics_list)):
+        dynamics = dynamics_list[d]
+        
+        if 'lattice' in scan: #resuming part way through the scan of this dynamics
+            lattice = np.array(scan['lattice'])
+            results = {column: scan[column].tolist() for column in result_columns + list(adaptive_columns) if column in scan}
+            series = {key: scan[key] for key in scan if key.startswith(('magnetizations_', 'energies_', 'stride_'))}
+        else:
+            lattice = initial_lattice(size, dynamics)
+            results = {column: [] for column in result_columns + (list(adaptive_columns) if adaptive else [])}
+            series = {} #the measurements of every finished temperature, kept for histogram reweighting
+    
+        for t in range(int(scan['temperature_index']), len(temperatures)):
+            scan.update(results, lattice=lattice, dynamics_index=d, temperature_index=t)
+            checkpoint.scan = scan
+            
+            stats = instrumentation.RunStats(30, f"{dynamics} T = {temperatures[t]:.2f}: ") if profile else None
+            model = IsingModel(size, temperatures[t], dynamics, lattice, stats=stats)
+            if model_state is not None: #the temperature the scan was stopped in
+                model.set_state(model_state)
+                model_state = None
+            if adaptive:
+                run_results = model.run_adaptive(target_samples, k)
+                for column, key in adaptive_columns.items():
+                    results[column].append(run_results[key])
+            else:
+                average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, lattice = model.run(nsweeps, k, checkpoint)
+                run_results = {'magnetization': average_M, 'susceptibility': susceptibility, 'susceptibility_error': susceptibility_error,
+                               'energy': average_E, 'heat_capacity': heat_capacity, 'heat_capacity_error': heatcapacity_error}
+            for column in result_columns:
+                results[column].append(run_results[column])
+            if profile:
+                print(stats.report())
+            lattice = model.lattice
+            series['magnetizations_' + str(t)] = np.array(model.measured_magnetizations)
+            series['energies_' + str(t)] = np.array(model.measured_energies)
+            series['stride_' + str(t)] = np.array(model.measurement_stride)
+            
+            scan.update(results, lattice=lattice, temperature_index=t + 1, **series)
+            checkpoint.save()
+            
+        write_data(dynamics + ".txt", temperatures, results['magnetization'], results['susceptibility'], results['energy'],
+                   results['heat_capacity'], results['heat_capacity_error'], results['susceptibility_error'],
+                   {column: results[column] for column in adaptive_columns} if adaptive else None)
+        write_timeseries(dynamics + "_timeseries.npz", size, temperatures,
+                         [series['magnetizations_' + str(t)] for t in range(len(temperatures))],
+                         [series['energies_' + str(t)] for t in range(len(temperatures))],
+                         [int(series['stride_' + str(t)]) for t in range(len(temperatures))])
+        
+        scan = {'adaptive': adaptive, 'dynamics_index': d + 1, 'temperature_index': 0}
+        checkpoint.scan = scan
+        checkpoint.save()
+    
+    print(f"checkpoint overhead: {100 * checkpoint.overhead():.3f}% of the run time")
+    os.remove(checkpoint.filename) #the scan is finished
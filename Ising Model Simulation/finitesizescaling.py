@@ -0,0 +1,149 @@
+import numpy as np
+import random
+import time
+import os
+import sys
+from multiprocessing import Pool
+
+from datawitherrors import IsingModel, initial_lattice
+import errorestimates
+
+#finite-size scaling: runs every lattice size at every temperature in a process pool, records <|M|>, <M^2> and
+#<M^4>, and estimates T_c from the crossings of the binder cumulants U_L(T) = 1 - <M^4> / (3 <M^2>^2) of
+#neighbouring sizes, which cross close to T_c because U_L is scale invariant there
+
+def run_job(args): #one lattice size at one temperature, runs in a worker process
+    size, temperature, dynamics, nequilibrate, nsweeps, seed = args
+    random.seed(seed) #workers would otherwise share the global generators used by the python, cluster and checkerboard updates
+    np.random.seed(seed)
+    model = IsingModel(size, temperature, dynamics, initial_lattice(size, dynamics), seed=seed)
+    for n in range(nequilibrate):
+        model.sweep()
+
+    magnetizations = []
+    time1 = time.time()
+    for n in range(nsweeps):
+        model.sweep()
+        magnetizations.append(model.current_magnetization)
+    sweeps_per_second = nsweeps / (time.time() - time1)
+
+    #magnetization per spin, with errors from measurements 2 tau_int apart like IsingModel.run_adaptive
+    M = np.abs(np.array(magnetizations, dtype=float)) / size ** 2
+    stride = max(1, int(np.ceil(2 * errorestimates.integrated_autocorrelation_time(M))))
+    susceptibility = lambda M: size ** 2 * (np.mean(M ** 2, axis=-1) - np.mean(M, axis=-1) ** 2) / temperature
+    binder = errorestimates.binder_estimator()
+    rng = np.random.default_rng(seed)
+    return {'size': size, 'temperature': temperature, 'magnetization': np.mean(M),
+            'M2': np.mean(M ** 2), 'M4': np.mean(M ** 4),
+            'susceptibility': susceptibility(M), 'susceptibility_error': errorestimates.bootstrap_error(M[::stride], susceptibility, 200, rng),
+            'binder': binder(M), 'binder_error': errorestimates.bootstrap_error(M[::stride], binder, 200, rng),
+            'sweeps_per_second': sweeps_per_second}
+
+def measure_costs(sizes, temperatures, dynamics, nsweeps=10):
+    #cost model for each size: seconds to set up a job (building the model, plus the error analysis, which costs about
+    #the same) and seconds per sweep, averaged over a few temperatures because e.g. wolff sweeps get slower above T_c
+    setup_times = {}
+    sweep_times = {}
+    for size in sizes:
+        setup_times[size] = 0
+        sweep_times[size] = 0
+        for temperature in temperatures:
+            time1 = time.time()
+            model = IsingModel(size, temperature, dynamics, initial_lattice(size, dynamics))
+            time2 = time.time()
+            for n in range(2): #warm up
+                model.sweep()
+            time3 = time.time()
+            for n in range(nsweeps):
+                model.sweep()
+            setup_times[size] += 2 * (time2 - time1) / len(temperatures)
+            sweep_times[size] += (time.time() - time3) / nsweeps / len(temperatures)
+    return setup_times, sweep_times
+
+def plan_sweeps(setup_times, sweep_times, ntemperatures, budget, processes, equilibration_fraction):
+    #largest number of measured sweeps per job that fits the wall-clock budget: the pool takes about the total cost
+    #divided by the number of processes, but never less than the single most expensive job
+    total_setup = ntemperatures * sum(setup_times.values())
+    total_sweep = ntemperatures * sum(sweep_times.values()) * (1 + equilibration_fraction)
+    largest = max(sweep_times, key=lambda size: setup_times[size] + sweep_times[size])
+    nsweeps = min((budget * processes - total_setup) / total_sweep,
+                  (budget - setup_times[largest]) / (sweep_times[largest] * (1 + equilibration_fraction)))
+    return max(int(nsweeps), 0)
+
+def crossings(temperatures, binder_small, binder_large): #temperatures where U_L(T) of two sizes cross, by linear interpolation
+    difference = binder_large - binder_small
+    i = np.flatnonzero(np.sign(difference[:-1]) != np.sign(difference[1:]))
+    return temperatures[i] - difference[i] * (temperatures[i + 1] - temperatures[i]) / (difference[i + 1] - difference[i])
+
+def crossing_temperature(temperatures, binder_small, binder_large, errors_small, errors_large, ndraws=1000, rng=None):
+    #mean crossing, with the error from redrawing the binder cumulants within their errors
+    rng = np.random.default_rng() if rng is None else rng
+    estimate = np.mean(crossings(temperatures, binder_small, binder_large))
+    draws = [crossings(temperatures, binder_small + errors_small * rng.standard_normal(len(temperatures)),
+                       binder_large + errors_large * rng.standard_normal(len(temperatures))) for draw in range(ndraws)]
+    draws = np.array([np.mean(draw) for draw in draws if len(draw) > 0])
+    return estimate, (np.std(draws) if len(draws) > 1 else np.nan)
+
+def write_scaling_data(name, results):
+    columns = ['size', 'temperature', 'magnetization', 'M2', 'M4', 'susceptibility', 'susceptibility_error', 'binder', 'binder_error', 'sweeps_per_second']
+    with open(name, 'w') as file:
+        file.write("Size\tTemperature\tMagnetization\tM2\tM4\tSusceptibility\tSusceptibility_Error\tBinder\tBinder_Error\tSweeps_Per_Second\n")
+        for result in results:
+            file.write("\t".join(str(result[column]) for column in columns) + "\n")
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 4 or (len(args) > 3 and args[3] == 'Kawasaki'):
+        print("finitesizescaling.py [budget_seconds] [processes] [dynamics, not Kawasaki]")
+        sys.exit(1)
+
+    budget = float(args[1]) if len(args) > 1 else 3600 #wall-clock budget for the whole study
+    processes = int(args[2]) if len(args) > 2 else os.cpu_count() #defaults to one process per core
+    dynamics = str(args[3]) if len(args) > 3 else 'Wolff' #cluster updates avoid critical slowing down near T_c
+
+    sizes = [16, 32, 64, 128, 256]
+    temperatures = np.linspace(2.2, 2.34, 15) #around T_c = 2.269
+    equilibration_fraction = 0.1 #equilibration sweeps as a fraction of the measured sweeps
+
+    time1 = time.time()
+    with Pool(processes) as pool:
+        #cost model: the measured costs of each size set the sweeps per job that fit what is left of the budget
+        setup_times, sweep_times = measure_costs(sizes, temperatures[[0, len(temperatures) // 2, -1]], dynamics)
+        nsweeps = plan_sweeps(setup_times, sweep_times, len(temperatures), budget - (time.time() - time1), processes, equilibration_fraction)
+        nequilibrate = int(equilibration_fraction * nsweeps)
+        print(f"{dynamics}, {processes} processes, budget {budget:.0f} s: {nsweeps} sweeps per job after {nequilibrate} equilibration sweeps")
+        if nsweeps < 100:
+            print("warning: the budget is too small for reliable results")
+        for size in sizes:
+            print(f"L = {size}: {1 / sweep_times[size]:.1f} sweeps per second, about {setup_times[size] + (nsweeps + nequilibrate) * sweep_times[size]:.1f} s per temperature")
+
+        #largest jobs first, so the big lattices do not finish last while the other processes sit idle
+        seeds = np.random.SeedSequence().spawn(len(sizes) * len(temperatures))
+        jobs = [(size, temperature, dynamics, nequilibrate, nsweeps, int(seed.generate_state(1)[0]))
+                for (size, temperature), seed in zip([(size, temperature) for size in sizes for temperature in temperatures], seeds)]
+        jobs.sort(key=lambda job: setup_times[job[0]] + nsweeps * sweep_times[job[0]], reverse=True)
+
+        results = []
+        for result in pool.imap_unordered(run_job, jobs):
+            results.append(result)
+            print(f"finished L = {result['size']}, T = {result['temperature']:.3f} ({len(results)}/{len(jobs)}), {time.time() - time1:.0f} s")
+        time2 = time.time()
+    print(f"time: {time2 - time1:.0f} s of the {budget:.0f} s budget")
+
+    results.sort(key=lambda result: (result['size'], result['temperature']))
+    write_scaling_data("FiniteSizeScaling.txt", results)
+
+    #T_c from the binder crossings of neighbouring sizes, which move towards T_c as the sizes grow
+    binder = {size: np.array([result['binder'] for result in results if result['size'] == size]) for size in sizes}
+    binder_errors = {size: np.array([result['binder_error'] for result in results if result['size'] == size]) for size in sizes}
+    for small, large in zip(sizes[:-1], sizes[1:]):
+        if len(crossings(temperatures, binder[small], binder[large])) == 0:
+            print(f"L = {small} and {large}: no crossing in the temperature range")
+            continue
+        T_c, T_c_error = crossing_temperature(temperatures, binder[small], binder[large], binder_errors[small], binder_errors[large])
+        print(f"L = {small} and {large}: binder cumulants cross at T = {T_c:.4f} +- {T_c_error:.4f}")
+    print("exact T_c of the infinite lattice: " + str(2 / np.log(1 + np.sqrt(2))))
@@ -0,0 +1,115 @@
+import numpy as np
+import random
+import time
+import sys
+from multiprocessing import Pool
+
+from datawitherrors import IsingModel, initial_lattice, write_data
+
+#replica exchange (parallel tempering): one IsingModel per temperature, all swept at the same time in a process pool,
+#with swaps between neighbouring temperatures proposed every exchange_interval sweeps
+
+def sweep_replica(args): #runs in a worker process, the model is sent back with its new lattice and random state
+    model, nsweeps, seed = args
+    random.seed(seed) #workers would otherwise share the global generators used by the python, cluster and checkerboard updates
+    np.random.seed(seed)
+    for n in range(nsweeps):
+        model.sweep()
+    return model
+
+class ParallelTempering(object):
+    def __init__(self, size, temperatures, dynamics, backend='python', processes=None):
+        self.size = size
+        self.temperatures = temperatures
+        self.dynamics = dynamics
+        self.processes = processes
+        #every model and every batch of sweeps gets its own seed spawned from this, so the replicas never share random
+        #numbers whichever worker they run in
+        self.seed_sequence = np.random.SeedSequence()
+        #models[i] is always the replica currently at temperatures[i]
+        self.models = [IsingModel(size, temperature, dynamics, initial_lattice(size, dynamics), backend=backend,
+                                  seed=int(child.generate_state(1)[0]))
+                       for temperature, child in zip(temperatures, self.seed_sequence.spawn(len(temperatures)))]
+        self.swap_attempts = np.zeros(len(temperatures) - 1, dtype=int) #for each pair of neighbouring temperatures (i, i+1)
+        self.swap_accepts = np.zeros(len(temperatures) - 1, dtype=int)
+
+    def exchange(self, parity): #propose swaps between temperatures (i, i+1) for every i of the given parity
+        for i in range(parity, len(self.temperatures) - 1, 2):
+            model1, model2 = self.models[i], self.models[i + 1]
+            delta = (1/model1.temperature - 1/model2.temperature) * (model1.current_energy - model2.current_energy)
+            self.swap_attempts[i] += 1
+            if delta >= 0 or random.random() < np.exp(delta): #metropolis condition for swapping the two configurations
+                self.swap_accepts[i] += 1
+                model1.set_temperature(self.temperatures[i + 1])
+                model2.set_temperature(self.temperatures[i])
+                self.models[i], self.models[i + 1] = model2, model1
+
+    def acceptance_rates(self):
+        return self.swap_accepts / np.maximum(self.swap_attempts, 1)
+
+    def run(self, nsweeps, k, exchange_interval=10):
+        #lists to store variables for each temperature
+        magnetizations = [[] for temperature in self.temperatures]
+        energies = [[] for temperature in self.temperatures]
+
+        with Pool(self.processes) as pool:
+            for n in range(0, nsweeps, exchange_interval):
+                seeds = [int(child.generate_state(1)[0]) for child in self.seed_sequence.spawn(len(self.models))]
+                self.models = pool.map(sweep_replica, [(model, exchange_interval, seed) for model, seed in zip(self.models, seeds)])
+
+                if n > 100: #wait 100 sweeps for equilibration, then store variables every exchange_interval sweeps
+                    for i in range(len(self.temperatures)):
+                        magnetizations[i].append(self.models[i].current_magnetization)
+                        energies[i].append(self.models[i].current_energy)
+
+                self.exchange((n // exchange_interval) % 2) #alternate between even and odd pairs
+
+        #calculate the relevant observables and their bootstrap errors for each temperature
+        results = []
+        for i in range(len(self.temperatures)):
+            model = self.models[i]
+            #replicas reaching a temperature from either ordered state would wash out <M>, so the susceptibility uses |M|
+            M = np.abs(magnetizations[i])
+            E = np.array(energies[i])
+            results.append((np.mean(M),
+                            model.susceptibility(M, M ** 2), model.bootstrap_error(M, 'susceptibility', k),
+                            np.mean(E),
+                            model.heat_capacity(E, E ** 2), model.bootstrap_error(E, 'heat capacity', k)))
+        return results
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 3:
+        print("paralleltempering.py [processes] [backend]")
+        sys.exit(1)
+
+    processes = int(args[1]) if len(args) > 1 else None #defaults to one process per core
+    backend = str(args[2]) if len(args) > 2 else 'python'
+
+    size = 50
+    temperatures = np.arange(1.0, 3.1, 0.1)
+    nsweeps = 10000 #number of sweeps for each temperature
+    k = 1000 #for bootstrap error
+
+    dynamics_list = ['Glauber', 'Kawasaki']
+
+    for dynamics in dynamics_list:
+        time1 = time.time()
+
+        parallel_tempering = ParallelTempering(size, temperatures, dynamics, backend, processes)
+        results = parallel_tempering.run(nsweeps, k)
+
+        time2 = time.time()
+        print(dynamics + " time: " + str(time2 - time1))
+        print("swap acceptance rates:")
+        for i, rate in enumerate(parallel_tempering.acceptance_rates()):
+            print(f"{temperatures[i]:.1f} <-> {temperatures[i+1]:.1f}: {rate:.3f}")
+        print("")
+
+        average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error = zip(*results)
+        write_data(dynamics + ".txt", temperatures, average_M, susceptibility, average_E,
+                   heat_capacity, heatcapacity_error, susceptibility_error)
@@ -0,0 +1,89 @@
+import numpy as np
+import time
+import sys
+
+from datawitherrors import IsingModel, initial_lattice, write_data, write_timeseries
+
+#temperature scan that spends its sweeps where the susceptibility and heat capacity peak or change quickly:
+#start from a coarse grid, then keep adding the midpoint of the interval with the highest score until the
+#budget of total sweeps runs out
+
+def interval_scores(temperatures, observables, errors, min_spacing):
+    #score of each interval between neighbouring temperatures (sorted), summed over the observables: the change
+    #across the interval beyond its statistical error, plus the peak value for the two intervals either side of the
+    #peak, each relative to the peak value. intervals already narrower than 2 * min_spacing are not split again
+    scores = np.zeros(len(temperatures) - 1)
+    for values, value_errors in zip(observables, errors):
+        peak = np.max(values)
+        if peak <= 0: #e.g. the susceptibility of kawasaki dynamics, which conserves M
+            continue
+        change = np.maximum(np.abs(np.diff(values)) - np.sqrt(value_errors[1:] ** 2 + value_errors[:-1] ** 2), 0)
+        scores += change / peak
+        peak_index = np.argmax(values)
+        scores[max(peak_index - 1, 0):peak_index + 1] += 1
+    scores[np.diff(temperatures) < 2 * min_spacing] = -1
+    return scores
+
+def refined_scan(size, dynamics, coarse_temperatures, nsweeps, k, budget, min_spacing):
+    results = {} #temperature: (average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error)
+    lattices = {} #final lattice at each temperature, to start the neighbouring ones from
+    series = {} #temperature: (magnetizations, energies, stride), for reweighting.py
+
+    def simulate(temperature, lattice):
+        model = IsingModel(size, temperature, dynamics, lattice.copy())
+        average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, lattices[temperature] = model.run(nsweeps, k)
+        results[temperature] = (average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error)
+        series[temperature] = (np.array(model.measured_magnetizations), np.array(model.measured_energies), model.measurement_stride)
+
+    #the coarse grid, each temperature starting from the lattice of the one before like datawitherrors.py
+    lattice = initial_lattice(size, dynamics)
+    for temperature in coarse_temperatures:
+        simulate(temperature, lattice)
+        lattice = lattices[temperature]
+    sweeps = nsweeps * len(coarse_temperatures)
+
+    #refine until the next temperature would go over the budget
+    while sweeps + nsweeps <= budget:
+        temperatures = np.array(sorted(results))
+        values = np.array([results[temperature] for temperature in temperatures]).T
+        scores = interval_scores(temperatures, [values[1], values[4]], [values[2], values[5]], min_spacing)
+        if np.max(scores) < 0: #every interval is as fine as allowed
+            break
+        i = np.argmax(scores)
+        simulate((temperatures[i] + temperatures[i + 1]) / 2, lattices[temperatures[i]]) #start from the colder neighbour
+        sweeps += nsweeps
+
+    temperatures = np.array(sorted(results))
+    return temperatures, [results[temperature] for temperature in temperatures], [series[temperature] for temperature in temperatures], sweeps
+
+
+if __name__ == "__main__":
+
+    # Read optional input arguments
+    args = sys.argv
+
+    if len(args) > 3:
+        print("refinedscan.py [budget] [min_spacing]")
+        sys.exit(1)
+
+    size = 50
+    nsweeps = 10000 #number of sweeps for each temperature
+    k = 1000 #for bootstrap error
+    coarse_temperatures = np.arange(1.0, 3.1, 0.5)
+    budget = int(args[1]) if len(args) > 1 else 21 * nsweeps #total sweeps, by default the cost of the uniform 0.1 grid
+    min_spacing = float(args[2]) if len(args) > 2 else 0.0125 #closest two temperatures are allowed to be
+
+    dynamics_list = ['Glauber', 'Kawasaki']
+
+    for dynamics in dynamics_list:
+        time1 = time.time()
+        temperatures, results, series, sweeps = refined_scan(size, dynamics, coarse_temperatures, nsweeps, k, budget, min_spacing)
+        time2 = time.time()
+        print(f"{dynamics}: {len(temperatures)} temperatures, {sweeps} sweeps, time: {time2 - time1:.1f} s")
+        print("temperatures: " + " ".join(f"{temperature:.4g}" for temperature in temperatures))
+
+        average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error = zip(*results)
+        write_data(dynamics + ".txt", temperatures, average_M, susceptibility, average_E,
+                   heat_capacity, heatcapacity_error, susceptibility_error)
+        write_timeseries(dynamics + "_timeseries.npz", size, temperatures, [M for M, E, stride in series], [E for M, E, stride in series],
+                         [stride for M, E, stride in series])
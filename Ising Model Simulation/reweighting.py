@@ -0,0 +1,138 @@
+import numpy as np
+import time
+import sys
+from scipy.special import logsumexp
+from scipy.optimize import minimize
+
+from datawitherrors import write_data
+from errorestimates import MAX_ELEMENTS
+
+#ferrenberg-swendsen histogram reweighting of the measurements saved by datawitherrors.py, giving <|M|>, chi, <E>
+#and C at any temperature near the simulated ones without running new simulations. every exponential is taken
+#relative to a log-sum-exp so the huge values of beta*E never overflow
+
+def load_timeseries(name):
+    with np.load(name) as data:
+        temperatures = data['temperatures']
+        magnetizations = [data['magnetizations_' + str(i)].astype(float) for i in range(len(temperatures))]
+        energies = [data['energies_' + str(i)].astype(float) for i in range(len(temperatures))]
+        return int(data['size']), temperatures, magnetizations, energies
+
+def histogram(magnetizations, energies):
+    #the energy only takes a few hundred distinct values, so the measurements are reduced to the number of
+    #measurements at each energy level and the sums of |M| and M^2 over them
+    levels, inverse, counts = np.unique(energies, return_inverse=True, return_counts=True)
+    sums = np.array([np.bincount(inverse, np.abs(magnetizations), len(levels)),
+                     np.bincount(inverse, magnetizations ** 2, len(levels))])
+    return levels, counts, sums
+
+def multi_histogram(levels, counts, run_sizes, temperatures, log_Z=None):
+    #solves the ferrenberg-swendsen equations for the partition functions of the simulated temperatures,
+    #Z_k = sum_E H(E) exp(-beta_k E) / sum_j n_j exp(-beta_j E) / Z_j, as the minimum of the equivalent convex
+    #function of log Z (fixing Z_0 = 1), which l-bfgs finds in a few dozen steps where the plain iteration takes
+    #thousands. returns log Z and, for every energy level, the log of the denominator sum_j n_j exp(-beta_j E) / Z_j
+    log_n = np.log(run_sizes)
+    minus_beta_E = -np.outer(1 / np.asarray(temperatures), levels) #(runs, energy levels)
+    total = np.sum(counts)
+
+    def objective(minus_log_Z):
+        minus_log_Z = np.concatenate(([0], minus_log_Z))
+        terms = log_n[:, np.newaxis] + minus_log_Z[:, np.newaxis] + minus_beta_E
+        log_denominator = logsumexp(terms, axis=0)
+        value = (counts @ log_denominator - run_sizes @ minus_log_Z) / total
+        gradient = (np.exp(terms - log_denominator) @ counts - run_sizes) / total
+        return value, gradient[1:]
+
+    if len(run_sizes) > 1:
+        start = np.zeros(len(run_sizes) - 1) if log_Z is None else -log_Z[1:]
+        minus_log_Z = minimize(objective, start, jac=True, method='L-BFGS-B',
+                               options={'maxiter': 10000, 'ftol': 1e-15, 'gtol': 1e-12}).x
+        log_Z = np.concatenate(([0], -minus_log_Z))
+    else: #a single histogram, nothing to solve
+        log_Z = np.zeros(1)
+    log_denominator = logsumexp(log_n[:, np.newaxis] - log_Z[:, np.newaxis] + minus_beta_E, axis=0)
+    return log_Z, log_denominator
+
+def reweight(size, levels, counts, sums, log_denominator, targets):
+    #<|M|>, chi, <E> and C at every target temperature from the histogram, shape (4, targets). the levels are the
+    #energies relative to their mean, so the variance is not the difference of two huge numbers. targets are done
+    #a chunk at a time so the (targets, energy levels) weight matrix stays bounded
+    N = size ** 2
+    mean_abs_M, mean_M2 = sums / counts #averages over the measurements at each energy level
+    observables = np.empty((4, len(targets)))
+    chunk = max(1, MAX_ELEMENTS // len(levels))
+    for start in range(0, len(targets), chunk):
+        T = targets[start:start + chunk]
+        log_weights = np.log(counts) - np.outer(1 / T, levels) - log_denominator
+        weights = np.exp(log_weights - logsumexp(log_weights, axis=1, keepdims=True)) #normalised for each target
+        average_abs_M, average_E = weights @ mean_abs_M, weights @ levels
+        observables[0, start:start + chunk] = average_abs_M
+        observables[1, start:start + chunk] = (weights @ mean_M2 - average_abs_M ** 2) / (N * T)
+        observables[2, start:start + chunk] = average_E
+        observables[3, start:start + chunk] = (weights @ levels ** 2 - average_E ** 2) / (N * T ** 2)
+    return observables
+
+def histogram_observables(size, temperatures, magnetizations, energies, targets, log_Z=None):
+    #multi-histogram reweighting of all the given runs together, also returning log Z
+    levels, counts, sums = histogram(np.concatenate(magnetizations), np.concatenate(energies))
+    shift = np.sum(counts * levels) / np.sum(counts) #mean energy, which also keeps log Z of order one
+    log_Z, log_denominator = multi_histogram(levels - shift, counts, np.array([len(E) for E in energies]), temperatures, log_Z)
+    observables = reweight(size, levels - shift, counts, sums, log_denominator, targets)
+    observables[2] += shift
+    return observables, log_Z
+
+def single_histogram_observables(size, temperatures, magnetizations, energies, targets):
+    #each target temperature is reweighted from the single run at the nearest simulated temperature
+    nearest = np.argmin(np.abs(targets[:, np.newaxis] - temperatures[np.newaxis, :]), axis=1)
+    observables = np.empty((4, len(targets)))
+    for run in np.unique(nearest):
+        observables[:, nearest == run] = histogram_observables(size, temperatures[run:run + 1], magnetizations[run:run + 1],
+                                                               energies[run:run + 1], targets[nearest == run])[0]
+    return observables
+
+def reweighted_observables(size, temperatures, magnetizations, energies, targets, method='multi', k=100, rng=None):
+    #observables at the targets with errors from k bootstrap resamples of every run. the susceptibility uses |M|,
+    #because runs at different temperatures can sit in opposite ordered states
+    rng = np.random.default_rng() if rng is None else rng
+    if method == 'single':
+        observables = single_histogram_observables(size, temperatures, magnetizations, energies, targets)
+    else:
+        observables, log_Z = histogram_observables(size, temperatures, magnetizations, energies, targets)
+
+    estimates = np.empty((k,) + observables.shape)
+    for b in range(k):
+        indices = [rng.integers(0, len(E), size=len(E)) for E in energies]
+        resampled_M = [M[i] for M, i in zip(magnetizations, indices)]
+        resampled_E = [E[i] for E, i in zip(energies, indices)]
+        if method == 'single':
+            estimates[b] = single_histogram_observables(size, temperatures, resampled_M, resampled_E, targets)
+        else: #the full solution is a good starting point for the resampled partition functions
+            estimates[b] = histogram_observables(size, temperatures, resampled_M, resampled_E, targets, log_Z)[0]
+    errors = np.std(estimates, axis=0)
+    return observables, errors
+
+
+if __name__ == "__main__":
+
+    # Read input arguments
+    args = sys.argv
+
+    if len(args) < 2 or len(args) > 5 or (len(args) > 2 and args[2] not in ('single', 'multi')):
+        print("reweighting.py timeseries_file [single/multi] [ntargets] [k]")
+        sys.exit(1)
+
+    name = str(args[1]) #e.g. Glauber_timeseries.npz, written by datawitherrors.py
+    method = str(args[2]) if len(args) > 2 else 'multi'
+    ntargets = int(args[3]) if len(args) > 3 else 2001
+    k = int(args[4]) if len(args) > 4 else 100 #for bootstrap error
+
+    size, temperatures, magnetizations, energies = load_timeseries(name)
+    targets = np.linspace(temperatures[0], temperatures[-1], ntargets)
+
+    time1 = time.time()
+    observables, errors = reweighted_observables(size, temperatures, magnetizations, energies, targets, method, k)
+    time2 = time.time()
+    print(f"{ntargets} temperatures, {method} histogram, {k} bootstrap resamples, time: {time2 - time1:.1f} s")
+
+    write_data(name.replace("_timeseries.npz", "") + "Reweighted.txt", targets, observables[0], observables[1], observables[2],
+               observables[3], errors[3], errors[1], {'Magnetization_Error': errors[0], 'Energy_Error': errors[2]})
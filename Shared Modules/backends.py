@@ -0,0 +1,231 @@
+import numpy as np
+from functools import lru_cache
+
+try:
+    import numba
+except ImportError: #numba is optional, the 'numba' backend falls back to 'numpy' without it
+    numba = None
+
+#update kernels for the lattice Monte Carlo models, chosen per model with get_backend(name):
+#   'python' - reference kernels, the model's own update methods using the random module
+#   'numpy'  - random numbers drawn a whole sweep at a time from the model's numpy generator, with boltzmann acceptance tables
+#   'numba'  - the same sweeps compiled with numba, falls back to 'numpy' if numba is not installed
+#the numpy and numba kernels use the same random numbers in the same order, so with the same seed they give identical lattices
+#a sweep returns the number of accepted updates, for models collecting run statistics (the python kernels only count
+#them when the model has a RunStats, and return None otherwise)
+
+BACKENDS = {}
+
+def register_backend(name, backend):
+    BACKENDS[name] = backend
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError("unknown backend " + str(name) + ", choose from " + ", ".join(BACKENDS))
+    return BACKENDS[name]
+
+@lru_cache(maxsize=None)
+def neighbour_table(size): #flat indices i*size + j of the four nearest neighbours of every site, with periodic boundaries
+    i, j = np.divmod(np.arange(size ** 2), size)
+    return np.stack([((i+1)%size) * size + j, ((i-1)%size) * size + j,
+                     i * size + (j+1)%size, i * size + (j-1)%size], axis=1)
+
+def boltzmann_table(temperature): #acceptance probability exp(-delta_E/T) for the possible delta_E = 0, 1, ..., 16
+    return np.exp(-np.arange(17) / temperature)
+
+
+#kernels are plain python loops over numpy arrays, run as they are by the numpy backend and compiled by the numba backend
+
+def glauber_kernel(lattice, neighbours, sites, uniforms, table):
+    delta_E_total = 0
+    delta_M_total = 0
+    accepted = 0
+    for n in range(sites.shape[0]):
+        s = sites[n]
+        delta_E = 2 * lattice[s] * (lattice[neighbours[s, 0]] + lattice[neighbours[s, 1]] + lattice[neighbours[s, 2]] + lattice[neighbours[s, 3]])
+        if delta_E <= 0 or uniforms[n] < table[delta_E]:
+            lattice[s] = -lattice[s]
+            delta_E_total += delta_E
+            delta_M_total += 2 * lattice[s]
+            accepted += 1
+    return delta_E_total, delta_M_total, accepted
+
+def kawasaki_kernel(lattice, neighbours, up_sites, down_sites, site_position, uniforms, table):
+    delta_E_total = 0
+    accepted = 0
+    if up_sites.shape[0] == 0 or down_sites.shape[0] == 0: #nothing to swap
+        return delta_E_total, accepted
+    for n in range(uniforms.shape[0]):
+        s1 = up_sites[int(uniforms[n, 0] * up_sites.shape[0])]
+        s2 = down_sites[int(uniforms[n, 1] * down_sites.shape[0])]
+        sum1 = lattice[neighbours[s1, 0]] + lattice[neighbours[s1, 1]] + lattice[neighbours[s1, 2]] + lattice[neighbours[s1, 3]]
+        sum2 = lattice[neighbours[s2, 0]] + lattice[neighbours[s2, 1]] + lattice[neighbours[s2, 2]] + lattice[neighbours[s2, 3]]
+        delta_E = 2 * sum1 - 2 * sum2
+        if neighbours[s2, 0] == s1 or neighbours[s2, 1] == s1 or neighbours[s2, 2] == s1 or neighbours[s2, 3] == s1:
+            delta_E += 4 #nearest neighbour correction, the bond between the two sites does not change
+        if delta_E <= 0 or uniforms[n, 2] < table[delta_E]:
+            lattice[s1] = -1
+            lattice[s2] = 1
+            delta_E_total += delta_E
+            position1 = site_position[s1]
+            position2 = site_position[s2]
+            up_sites[position1] = s2
+            down_sites[position2] = s1
+            site_position[s1] = position2
+            site_position[s2] = position1
+            accepted += 1
+    return delta_E_total, accepted
+
+def sirs_kernel(lattice, neighbours, sites, uniforms, p1, p2, p3): #returns the number of updates that changed a site
+    changed = 0
+    for n in range(sites.shape[0]):
+        s = sites[n]
+        state = lattice[s]
+        if state == 0:
+            if uniforms[n] < p1 and (lattice[neighbours[s, 0]] == -1 or lattice[neighbours[s, 1]] == -1
+                                     or lattice[neighbours[s, 2]] == -1 or lattice[neighbours[s, 3]] == -1):
+                lattice[s] = -1
+                changed += 1
+        elif state == -1:
+            if uniforms[n] < p2:
+                lattice[s] = 1
+                changed += 1
+        elif state == 1:
+            if uniforms[n] < p3:
+                lattice[s] = 0
+                changed += 1
+    return changed
+
+
+class PythonBackend(object):
+    def ising_sweep(self, model):
+        update = model.glauber_update if model.dynamics == 'Glauber' else model.kawasaki_update
+        return self.run_updates(model, update)
+
+    def sirs_sweep(self, model):
+        return self.run_updates(model, model.update)
+
+    def run_updates(self, model, update): #one update per site, counting the accepted ones (update returns True) only for run statistics
+        if getattr(model, 'stats', None) is None:
+            for n in range(model.size ** 2):
+                update()
+            return None
+        accepted = 0
+        for n in range(model.size ** 2):
+            if update():
+                accepted += 1
+        return accepted
+
+
+class NumpyBackend(object):
+    glauber_kernel = staticmethod(glauber_kernel)
+    kawasaki_kernel = staticmethod(kawasaki_kernel)
+    sirs_kernel = staticmethod(sirs_kernel)
+    
+    def ising_sweep(self, model):
+        N = model.size ** 2
+        table = boltzmann_table(model.temperature)
+        flat_lattice = model.lattice.reshape(-1)
+        if model.dynamics == 'Glauber':
+            sites = model.rng.integers(0, N, size=N)
+            uniforms = model.rng.random(N)
+            delta_E, delta_M, accepted = self.glauber_kernel(flat_lattice, neighbour_table(model.size), sites, uniforms, table)
+        elif model.dynamics == 'Kawasaki':
+            uniforms = model.rng.random((N, 3)) #picks the up site, the down site and the acceptance
+            delta_E, accepted = self.kawasaki_kernel(flat_lattice, neighbour_table(model.size), model.up_sites, model.down_sites,
+                                                     model.site_position, uniforms, table)
+            delta_M = 0
+        model.current_energy += delta_E
+        model.current_magnetization += delta_M
+        return accepted
+
+    def sirs_sweep(self, model):
+        N = model.size ** 2
+        sites = model.rng.integers(0, N, size=N)
+        uniforms = model.rng.random(N) #one random number per update is enough as each state only ever needs one
+        return self.sirs_kernel(model.lattice.reshape(-1), neighbour_table(model.size), sites, uniforms, model.p1, model.p2, model.p3)
+
+
+class NumbaBackend(NumpyBackend): #compiled on first use, each kernel runs a whole sweep natively
+    if numba is not None:
+        glauber_kernel = staticmethod(numba.njit(cache=True)(glauber_kernel))
+        kawasaki_kernel = staticmethod(numba.njit(cache=True)(kawasaki_kernel))
+        sirs_kernel = staticmethod(numba.njit(cache=True)(sirs_kernel))
+
+
+register_backend('python', PythonBackend())
+register_backend('numpy', NumpyBackend())
+if numba is not None:
+    register_backend('numba', NumbaBackend())
+else:
+    register_backend('numba', BACKENDS['numpy'])
+
+
+if __name__ == "__main__":
+    
+    #check that every backend gives the same statistics, and that numpy and numba give identical lattices for the same seed
+    import errorestimates
+    import os
+    import sys
+    import time
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Ising Model Simulation'))
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Game of Life and SIRS Simulations'))
+    from datawitherrors import IsingModel
+    from SIRSpart3 import SIRS
+    
+    size = 16
+    nsweeps = 2000
+    
+    print("numba installed: " + str(numba is not None))
+    
+    #the python backend draws other random numbers than numpy, so the two can only agree within their errors: blocking
+    #errors for the means and the bootstrap error for C, allowing a difference of up to 4 combined errors
+    def check_agreement(label, python_results, numpy_results):
+        for observable, (value, error) in python_results.items():
+            numpy_value, numpy_error = numpy_results[observable]
+            if abs(value - numpy_value) > 4 * np.hypot(error, numpy_error):
+                raise RuntimeError(f"python and numpy backends disagree on {observable} for {label}: {value} +/- {error} against {numpy_value} +/- {numpy_error}")
+    
+    for dynamics in ['Glauber', 'Kawasaki']:
+        for temperature in [1.5, 2.5]:
+            results = {}
+            for name in BACKENDS:
+                lattice = np.ones((size, size), dtype=int)
+                if dynamics == 'Kawasaki':
+                    lattice[:, :size//2] = -1
+                model = IsingModel(size, temperature, dynamics, lattice, backend=name, seed=1)
+                time1 = time.time()
+                average_M, susceptibility, susceptibility_error, average_E, heat_capacity, heatcapacity_error, lattice = model.run(nsweeps, 100)
+                time2 = time.time()
+                M_error = errorestimates.blocking_error(np.abs(model.measured_magnetizations))
+                E_error = errorestimates.blocking_error(model.measured_energies)
+                results[name] = {'<|M|>': (average_M, M_error), '<E>': (average_E, E_error), 'C': (heat_capacity, heatcapacity_error)}
+                print(f"{dynamics}\tT = {temperature}\t{name}\t<|M|> = {average_M:.1f} +/- {M_error:.1f}\t<E> = {average_E:.1f} +/- {E_error:.1f}\tC = {heat_capacity:.3f} +/- {heatcapacity_error:.3f}\t{time2 - time1:.2f} s")
+            check_agreement(f"{dynamics} at T = {temperature}", results['python'], results['numpy'])
+    
+    results = {}
+    for name in BACKENDS:
+        np.random.seed(1)
+        model = SIRS(size, 0.5, 0.5, 0.5, backend=name, seed=1)
+        #SIRS.run only returns the mean, so the sweeps are made here to keep the series for its error
+        fractions = []
+        for n in range(nsweeps):
+            model.sweep()
+            if n > 100:
+                fractions.append(model.infected_sites() / size ** 2)
+        results[name] = {'infected fraction': (np.mean(fractions), errorestimates.blocking_error(fractions))}
+        print(f"SIRS\tp1 = p2 = p3 = 0.5\t{name}\taverage infected fraction = {np.mean(fractions):.4f} +/- {errorestimates.blocking_error(fractions):.4f}")
+    check_agreement("SIRS", results['python'], results['numpy'])
+    print("python and numpy backends agree within 4 combined errors")
+    
+    #same seed, same random numbers, so the numpy and numba kernels must agree exactly
+    for dynamics in ['Glauber', 'Kawasaki']:
+        lattice = np.ones((size, size), dtype=int)
+        lattice[:, :size//2] = -1
+        models = [IsingModel(size, 2.3, dynamics, lattice.copy(), backend=name, seed=2) for name in ['numpy', 'numba']]
+        for model in models:
+            for n in range(20):
+                model.sweep()
+        if not np.array_equal(models[0].lattice, models[1].lattice) or models[0].current_energy != models[1].current_energy:
+            raise RuntimeError("numpy and numba " + dynamics + " kernels disagree")
+    print("numpy and numba kernels agree exactly")
@@ -0,0 +1,194 @@
+import numpy as np
+import random
+import time
+import json
+import os
+import sys
+import ast
+import platform
+import subprocess
+
+#throughput benchmarks for the hot loops of the simulations, stored as json with the machine they ran on, and a
+#compare command that flags anything that got slower than a stored baseline
+
+repository = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(repository, 'Ising Model Simulation'))
+sys.path.append(os.path.join(repository, 'Game of Life and SIRS Simulations'))
+import backends
+import GoLengine
+from datawitherrors import IsingModel, initial_lattice
+from GoLpart2 import GameofLife
+from SIRSpart3 import SIRS
+
+def measure(function, units, min_time=0.5, batch_time=0.01):
+    #best throughput (units per second) over short batches of calls spread across min_time. other work on the machine
+    #slows down whole stretches of a second or so, which the best short batch avoids where the average over a long
+    #run does not. the first call is a warm up, so numba compilation and first-touch costs are not counted
+    function()
+    best = 0
+    total_time = 0
+    while total_time < min_time:
+        calls = 0
+        time1 = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - time1
+            if elapsed >= batch_time:
+                break
+        total_time += elapsed
+        best = max(best, calls * units / elapsed)
+    return best
+
+def notebook_definitions(name):
+    #runs the cells of a notebook that only import, define functions and assign without calling anything, so no
+    #plots or long runs
+    import matplotlib
+    matplotlib.use('Agg')
+    with open(os.path.join(repository, name)) as file:
+        notebook = json.load(file)
+    namespace = {}
+    for cell in notebook['cells']:
+        if cell['cell_type'] != 'code':
+            continue
+        source = "".join(line for line in cell['source'] if not line.lstrip().startswith('%')) #skip ipython magics
+        statements = ast.parse(source).body
+        definitions = [isinstance(statement, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+                       or (isinstance(statement, ast.Assign) and not any(isinstance(node, ast.Call) for node in ast.walk(statement)))
+                       for statement in statements]
+        if statements and all(definitions):
+            exec(source, namespace)
+    return namespace
+
+def ising_benchmarks(sizes, backend_names, min_time):
+    results = {}
+    for dynamics in ['Glauber', 'Kawasaki']:
+        for backend in backend_names:
+            for size in sizes:
+                model = IsingModel(size, 2.3, dynamics, initial_lattice(size, dynamics), backend=backend, seed=1)
+                rate = measure(model.sweep, 1, min_time)
+                results[f"ising_sweep/{dynamics}/{backend}/L={size}"] = {'rate': rate, 'unit': 'sweeps/s', 'site_updates_per_second': rate * size ** 2}
+    return results
+
+def game_of_life_benchmarks(sizes, engine_names, min_time):
+    #'numpy', the default engine of GameofLife, keeps the gol_update/L=... names from before there were engines, so
+    #it is compared with baselines recorded then, and the other engines have their name in the key
+    results = {}
+    for engine in engine_names:
+        for size in sizes:
+            model = GameofLife(size, engine)
+            if engine == 'hashlife': #registered on the plane, so made periodic like the others (sizes are powers of two)
+                model.engine = GoLengine.HashLife(size, periodic=True)
+            rate = measure(model.update, 1, min_time)
+            name = f"gol_update/L={size}" if engine == 'numpy' else f"gol_update/{engine}/L={size}"
+            results[name] = {'rate': rate, 'unit': 'updates/s', 'site_updates_per_second': rate * size ** 2}
+    return results
+
+def sirs_benchmarks(sizes, backend_names, min_time):
+    results = {}
+    for backend in backend_names:
+        for size in sizes:
+            model = SIRS(size, 0.8, 0.1, 0.01, backend=backend, seed=1) #dynamic equilibrium, so the lattice stays mixed
+            rate = measure(model.sweep, 1, min_time)
+            results[f"sirs_sweep/{backend}/L={size}"] = {'rate': rate, 'unit': 'sweeps/s', 'site_updates_per_second': rate * size ** 2}
+    return results
+
+def bootstrap_benchmarks(lengths, k, min_time):
+    results = {}
+    model = IsingModel(16, 2.3, 'Glauber', initial_lattice(16, 'Glauber'), seed=1)
+    for length in lengths:
+        measurements = np.random.default_rng(1).normal(0, 100, length)
+        rate = measure(lambda: model.bootstrap_error(measurements, 'susceptibility', k), k, min_time)
+        results[f"bootstrap_error/n={length}/k={k}"] = {'rate': rate, 'unit': 'resamples/s'}
+    return results
+
+def baseball_benchmarks(min_time):
+    #p3_task1 in the notebook solves the trajectory with four different sets of forces
+    namespace = notebook_definitions('Baseballs in Flight.ipynb')
+    plt = namespace['plt']
+    def solve():
+        namespace['p3_task1'](40, 35)
+        plt.close('all')
+    return {"baseball_trajectory": {'rate': measure(solve, 4, min_time), 'unit': 'trajectories/s'}}
+
+def machine_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repository, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    import scipy
+    return {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'machine': platform.machine(), 'processor': platform.processor(),
+            'platform': platform.platform(), 'node': platform.node(), 'cpu_count': os.cpu_count(),
+            'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+            'numba': backends.numba.__version__ if backends.numba is not None else None, 'commit': commit}
+
+def run_benchmarks(quick=False):
+    random.seed(1)
+    np.random.seed(1)
+    min_time = 0.1 if quick else 0.5 #seconds spent measuring each benchmark
+    results = {}
+    results.update(ising_benchmarks([16, 32, 64], ['python', 'numpy', 'numba'], min_time))
+    gol_engines = [name for name in GoLengine.ENGINES if name != 'unbounded'] #every engine that runs on a periodic grid
+    results.update(game_of_life_benchmarks([16, 32, 64], gol_engines, min_time))
+    results.update(sirs_benchmarks([16, 32, 64], ['python', 'numpy', 'numba'], min_time))
+    results.update(bootstrap_benchmarks([1000, 10000], 1000, min_time))
+    try:
+        results.update(baseball_benchmarks(min_time))
+    except ImportError: #the notebook plots with matplotlib
+        print("skipping baseball_trajectory: matplotlib is not installed")
+    return {'metadata': machine_metadata(), 'results': results}
+
+def compare(baseline, current, threshold=0.1):
+    #prints every benchmark with the ratio of current to baseline throughput and returns the names of those that
+    #got slower by more than the threshold (a fraction of the baseline)
+    slower = []
+    print("benchmark\tbaseline\tcurrent\tratio")
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        if name not in current['results'] or name not in baseline['results']:
+            print(f"{name}\t{'only in baseline' if name in baseline['results'] else 'only in current'}")
+            continue
+        old, new = baseline['results'][name], current['results'][name]
+        ratio = new['rate'] / old['rate']
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "\tSLOWER"
+            slower.append(name)
+        print(f"{name}\t{old['rate']:.4g}\t{new['rate']:.4g} {new['unit']}\t{ratio:.2f}{flag}")
+    return slower
+
+
+if __name__ == "__main__":
+
+    # Read input arguments
+    args = sys.argv
+
+    if len(args) < 2 or args[1] not in ('run', 'compare') or (args[1] == 'run' and len(args) > 4) or (args[1] == 'compare' and not 3 <= len(args) <= 5):
+        print("benchmarks.py run [output_file] [quick]")
+        print("benchmarks.py compare baseline_file [current_file] [threshold]")
+        sys.exit(1)
+
+    if args[1] == 'run':
+        name = str(args[2]) if len(args) > 2 else 'benchmark_results.json'
+        results = run_benchmarks(quick=len(args) > 3 and args[3] == 'quick')
+        with open(name, 'w') as file:
+            json.dump(results, file, indent=1)
+        for benchmark, result in results['results'].items():
+            print(f"{benchmark}\t{result['rate']:.4g} {result['unit']}")
+        print("saved to " + name)
+
+    else: #compares against a new run unless a file with the current results is given
+        with open(args[2]) as file:
+            baseline = json.load(file)
+        if len(args) > 3:
+            with open(args[3]) as file:
+                current = json.load(file)
+        else:
+            current = run_benchmarks()
+        threshold = float(args[4]) if len(args) > 4 else 0.1
+        if baseline['metadata']['platform'] != current['metadata']['platform'] or baseline['metadata']['processor'] != current['metadata']['processor']:
+            print("note: the baseline was measured on a different machine")
+        slower = compare(baseline, current, threshold)
+        if slower:
+            print(f"{len(slower)} benchmarks are more than {100 * threshold:.0f}% slower than the baseline")
+            sys.exit(1)
+        print("no slowdowns")
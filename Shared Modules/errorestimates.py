@@ -0,0 +1,87 @@
+import numpy as np
+
+#error estimates for observables calculated from a list of measurements, shared by datawitherrors.py and SIRSpart4.py
+#an estimator takes an array of resampled measurements and works along its last axis, so a whole matrix of resamples
+#(one per row) is evaluated at once
+
+MAX_ELEMENTS = 10 ** 7 #largest resample matrix held in memory at once (80 MB of floats)
+
+def susceptibility_estimator(size, temperature):
+    return lambda M: (np.mean(M ** 2, axis=-1) - np.mean(M, axis=-1) ** 2) / ((size ** 2) * temperature)
+
+def heat_capacity_estimator(size, temperature):
+    return lambda E: (np.mean(E ** 2, axis=-1) - np.mean(E, axis=-1) ** 2) / ((size ** 2) * (temperature ** 2))
+
+def binder_estimator(): #binder cumulant U = 1 - <M^4> / (3 <M^2>^2), for the finite-size-scaling driver
+    return lambda M: 1 - np.mean(M ** 4, axis=-1) / (3 * np.mean(M ** 2, axis=-1) ** 2)
+
+def variance_estimator(size): #variance of the number of infected sites per site, for the SIRS model
+    return lambda I: (np.mean(I ** 2, axis=-1) - np.mean(I, axis=-1) ** 2) / (size ** 2)
+
+def bootstrap_estimates(variables, estimator, k, rng=None):
+    variables = np.asarray(variables, dtype=float)
+    rng = np.random.default_rng() if rng is None else rng
+    number_of_measurements = len(variables)
+
+    #draw the resample indices as an integer matrix, a chunk of rows at a time to keep memory bounded
+    chunk = max(1, MAX_ELEMENTS // number_of_measurements)
+    estimates = np.empty(k)
+    for start in range(0, k, chunk):
+        rows = min(chunk, k - start)
+        indices = rng.integers(0, number_of_measurements, size=(rows, number_of_measurements))
+        estimates[start:start + rows] = estimator(variables[indices])
+    return estimates
+
+def bootstrap_error(variables, estimator, k, rng=None):
+    #error is the standard deviation of the observable over k resampled sets of measurements
+    estimates = bootstrap_estimates(variables, estimator, k, rng)
+    return np.sqrt(np.mean(estimates ** 2) - np.mean(estimates) ** 2)
+
+def jackknife_error(variables, estimator, nblocks=None):
+    #leave out one block of measurements at a time, by default one measurement per block (up to 1000 blocks)
+    variables = np.asarray(variables, dtype=float)
+    number_of_measurements = len(variables)
+    if nblocks is None:
+        nblocks = min(number_of_measurements, 1000)
+    block_size = number_of_measurements // nblocks
+    variables = variables[:nblocks * block_size] #drop the few measurements left over from uneven blocks
+
+    #row b of the index matrix keeps every measurement apart from those in block b
+    kept = np.arange(nblocks * block_size - block_size)
+    chunk = max(1, MAX_ELEMENTS // len(variables))
+    estimates = np.empty(nblocks)
+    for start in range(0, nblocks, chunk):
+        blocks = np.arange(start, min(start + chunk, nblocks))
+        indices = kept + block_size * (kept[np.newaxis, :] >= blocks[:, np.newaxis] * block_size)
+        estimates[blocks] = estimator(variables[indices])
+    return np.sqrt((nblocks - 1) * (np.mean(estimates ** 2) - np.mean(estimates) ** 2))
+
+def blocking_errors(variables):
+    #error of the mean for correlated measurements: average neighbouring pairs repeatedly, the naive error of the mean
+    #grows with each blocking level until the blocks are longer than the correlation time and then levels off
+    variables = np.asarray(variables, dtype=float)
+    errors = []
+    while len(variables) >= 2:
+        errors.append(np.sqrt(np.var(variables) / (len(variables) - 1)))
+        variables = 0.5 * (variables[0:len(variables) // 2 * 2:2] + variables[1:len(variables) // 2 * 2:2])
+    return np.array(errors)
+
+def blocking_error(variables, min_blocks=32):
+    #largest error over the blocking levels that still have at least min_blocks blocks
+    errors = blocking_errors(variables)
+    levels = max(1, int(np.log2(max(len(variables) // min_blocks, 1))) + 1)
+    return np.max(errors[:levels])
+
+def integrated_autocorrelation_time(series, c=5):
+    #tau_int = 1/2 + sum of the normalised autocorrelation function, summed up to the first window W >= c * tau_int(W)
+    x = np.asarray(series, dtype=float) - np.mean(series)
+    n = len(x)
+    if np.all(x == 0):
+        return 0.5
+    f = np.fft.rfft(x, 2 * n) #zero padded so the fft gives the linear, not circular, autocorrelation
+    autocorrelation = np.fft.irfft(f * np.conj(f))[:n]
+    autocorrelation /= autocorrelation[0]
+    taus = np.cumsum(autocorrelation) - 0.5
+    windows = np.arange(n)
+    window = np.argmax(windows >= c * taus) if np.any(windows >= c * taus) else n - 1
+    return taus[window]
@@ -0,0 +1,84 @@
+import time
+from contextlib import nullcontext
+
+#opt-in run statistics for the monte carlo models (IsingModel in datawitherrors.py and the SIRS classes): wall time
+#per phase of a run, updates attempted and accepted, sweeps per second and an optional progress line. a model only
+#collects them when it is given a RunStats, otherwise the only extra work is a check for None once per sweep.
+#sweeps are counted but not timed one by one, which would cost more than a small numba sweep: the sweep time is
+#whatever part of the run the other phases (measurements, error analysis, checkpoints) do not account for
+
+NO_TIMER = nullcontext() #what timer() gives a model without a RunStats
+
+class PhaseTimer(object):
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.time1 = time.perf_counter()
+
+    def __exit__(self, *exception):
+        self.stats.add_time(self.phase, time.perf_counter() - self.time1)
+
+def timer(stats, phase): #context manager adding the time spent inside it to a phase, does nothing if stats is None
+    return NO_TIMER if stats is None else PhaseTimer(stats, phase)
+
+class RunStats(object):
+    def __init__(self, progress_interval=None, label=""):
+        self.progress_interval = progress_interval #seconds between progress lines, None for no progress lines
+        self.label = label #starts the progress lines and the summary, e.g. the dynamics and temperature
+        self.phase_times = {} #phase: seconds, timed by timer()
+        self.sweeps = 0
+        self.attempted = 0 #single-site updates (or kawasaki swaps), not counted for cluster updates
+        self.accepted = 0
+        self.start()
+
+    def start(self, total_sweeps=None): #called by the model when a run starts, total_sweeps gives the estimated time left
+        self.total_sweeps = total_sweeps
+        self.start_time = time.perf_counter()
+        self.last_progress = self.start_time
+        self.end_time = None
+
+    def stop(self): #called by the model when a run ends, so the summary does not count time spent after it
+        self.end_time = time.perf_counter()
+
+    def add_time(self, phase, seconds):
+        self.phase_times[phase] = self.phase_times.get(phase, 0) + seconds
+
+    def count_sweep(self, attempted, accepted):
+        self.sweeps += 1
+        self.attempted += attempted
+        self.accepted += accepted
+        if self.progress_interval is not None and self.sweeps % 16 == 0: #the clock is only read every 16 sweeps
+            now = time.perf_counter()
+            if now - self.last_progress >= self.progress_interval:
+                self.last_progress = now
+                print(self.progress_line(now))
+
+    def acceptance(self):
+        return self.accepted / self.attempted if self.attempted > 0 else float('nan')
+
+    def progress_line(self, now):
+        elapsed = now - self.start_time
+        line = f"{self.label}{self.sweeps} sweeps, {self.sweeps / elapsed:.1f} sweeps/s"
+        if self.attempted > 0:
+            line += f", acceptance {self.acceptance():.3f}"
+        if self.total_sweeps is not None: #from the average rate so far, including measurements
+            line += f", estimated time left: {elapsed * max(self.total_sweeps - self.sweeps, 0) / self.sweeps:.0f} s"
+        return line
+
+    def summary(self):
+        total_time = (time.perf_counter() if self.end_time is None else self.end_time) - self.start_time
+        phase_times = dict(sweep=total_time - sum(self.phase_times.values()), **self.phase_times) #sweeps and the loop around them
+        return {'sweeps': self.sweeps, 'attempted': self.attempted, 'accepted': self.accepted, 'acceptance': self.acceptance(),
+                'sweeps_per_second': self.sweeps / phase_times['sweep'] if phase_times['sweep'] > 0 else float('nan'),
+                'total_time': total_time, 'phase_times': phase_times}
+
+    def report(self): #the summary as a few printable lines
+        summary = self.summary()
+        lines = [f"{self.label}{summary['sweeps']} sweeps in {summary['total_time']:.2f} s, {summary['sweeps_per_second']:.1f} sweeps/s"]
+        if summary['attempted'] > 0:
+            lines.append(f"    acceptance {summary['acceptance']:.4f} ({summary['accepted']} of {summary['attempted']} updates)")
+        lines.append("    " + ", ".join(f"{phase} {seconds:.3f} s ({100 * seconds / summary['total_time']:.1f}%)"
+                                          for phase, seconds in summary['phase_times'].items()))
+        return "\n".join(lines)